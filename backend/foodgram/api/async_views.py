@@ -0,0 +1,58 @@
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.urls import URLPattern
+from rest_framework.permissions import SAFE_METHODS
+
+
+def render_in_thread(view, request, *args, **kwargs):
+    """Run a DRF view and render it, all on the calling worker thread.
+
+    Connections of pool threads are not closed by `request_finished`,
+    so they are recycled here around every request.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        # Streams are produced later, see `core.asgi.StreamingASGIHandler`.
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """Serve safe methods of `view` from the thread pool.
+
+    Django 3.2 has no async ORM and runs every sync view in one shared
+    thread under ASGI. Reads are moved to the default executor, so one
+    worker serves many of them concurrently while waiting on the
+    database. Writes keep the thread-sensitive sync path.
+    """
+    read = sync_to_async(render_in_thread, thread_sensitive=False)
+    write = sync_to_async(view, thread_sensitive=True)
+
+    async def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await read(view, request, *args, **kwargs)
+        return await write(request, *args, **kwargs)
+
+    wrapper.csrf_exempt = True
+    wrapper.cls = view.cls
+    wrapper.actions = view.actions
+    wrapper.initkwargs = view.initkwargs
+    return wrapper
+
+
+def async_read_patterns(patterns, viewsets):
+    """Wrap router `patterns` of `viewsets` with `async_read_view`."""
+    wrapped = []
+    for pattern in patterns:
+        view = pattern.callback
+        if getattr(view, 'cls', None) in viewsets:
+            pattern = URLPattern(
+                pattern.pattern, async_read_view(view),
+                pattern.default_args, pattern.name
+            )
+        wrapped.append(pattern)
+    return wrapped
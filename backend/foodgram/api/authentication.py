@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+from core.metrics import metrics
+from core.versions import get_version
+from users.models import User
+
+
+def auth_scope(user_id):
+    return f'auth:{user_id}'
+
+
+# User fields kept in snapshots, all of them bump the auth version. The
+# rest, the password hash included, is deferred, read fresh on access and
+# left out of full saves.
+USER_FIELDS = ('id', 'is_superuser', 'is_staff', 'is_active')
+
+
+def snapshot(instance, only=None):
+    # In model order, as `Model.from_db` expects for partial rows.
+    fields = [field.attname for field in instance._meta.concrete_fields
+              if only is None or field.attname in only]
+    return fields, [getattr(instance, name) for name in fields]
+
+
+class TokenCache:
+    """Bounded LRU of token snapshots with a TTL and an optional shared tier.
+
+    Entries keep the auth version of their user, bumping it (logout,
+    password, `is_active` or staff change) invalidates them in every
+    worker.
+    """
+
+    def __init__(self, max_size, ttl, shared):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = self.shared_hits = self.misses = 0
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _set_local(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        value = self._get_local(key)
+        tier = 'local'
+        if value is None and self.shared:
+            value = cache.get(f'token:{key}')
+            tier = 'shared'
+        if value is not None:
+            user_id, version = value[0][1][0], value[2]
+            if get_version(auth_scope(user_id)) == version:
+                if tier == 'shared':
+                    self._set_local(key, value)
+                with self._lock:
+                    if tier == 'shared':
+                        self.shared_hits += 1
+                    else:
+                        self.hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, user, token):
+        value = (snapshot(user, USER_FIELDS), snapshot(token),
+                 get_version(auth_scope(user.pk)))
+        self._set_local(key, value)
+        if self.shared:
+            cache.set(f'token:{key}', value, self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self):
+        with self._lock:
+            size = len(self._entries)
+            hits, shared_hits, misses = (
+                self.hits, self.shared_hits, self.misses
+            )
+        lookups = hits + shared_hits + misses
+        return {
+            'size': size,
+            'hits': hits,
+            'shared_hits': shared_hits,
+            'misses': misses,
+            'hit_rate': (hits + shared_hits) / lookups if lookups else 0.0,
+        }
+
+
+token_cache = TokenCache(
+    settings.TOKEN_CACHE_SIZE,
+    settings.TOKEN_CACHE_TTL,
+    settings.TOKEN_CACHE_SHARED,
+)
+metrics.register_collector('token_cache', token_cache.metrics)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the token/user join on cache hits."""
+
+    def authenticate_credentials(self, key):
+        value = token_cache.get(key)
+        if value is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, token)
+            return user, token
+        (user_fields, user_values), (token_fields, token_values), _ = value
+        user = User.from_db('default', user_fields, user_values)
+        token = self.get_model().from_db('default', token_fields, token_values)
+        token.user = user
+        return user, token
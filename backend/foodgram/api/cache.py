@@ -0,0 +1,129 @@
+import time
+from contextlib import nullcontext
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import (get_conditional_response, patch_vary_headers,
+                                quote_etag)
+from rest_framework.response import Response
+from rest_framework.status import HTTP_200_OK
+
+from core.routers import primary_reads
+from core.versions import (get_version, get_versions, recently_bumped,
+                           user_scope)
+
+
+class ConditionalGetMixin:
+    """Answer list and retrieve with ETags built from scope versions.
+
+    A matching If-None-Match gets a 304 before the queryset or the
+    serializer is touched. With `etag_per_user` the user's own version
+    (favorites, shopping cart, subscriptions) is part of the tag too.
+    With `etag_max_age` tags also change every that many seconds, for
+    data that changes without a version bump.
+
+    Shortly after a bump, bodies are read from the primary: a lagging
+    replica would send stale data under the new tag, and clients would
+    keep it until the next bump.
+    """
+    etag_scopes = ()
+    etag_per_user = False
+    etag_max_age = None
+
+    def get_etag_scopes(self, request, scopes):
+        scopes = list(scopes)
+        user = request.user
+        if self.etag_per_user and not user.is_anonymous:
+            scopes.append(user_scope(user.pk))
+        return scopes
+
+    def get_etag(self, request, scopes):
+        user = request.user
+        versions = get_versions(*scopes)
+        if self.etag_max_age:
+            versions += (int(time.time() // self.etag_max_age), )
+        accept = request.META.get('HTTP_ACCEPT', '')
+        return md5(
+            f'{versions}:{user.pk}:{request.get_full_path()}:{accept}'
+            .encode()
+        ).hexdigest()
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        scopes = self.get_etag_scopes(
+            request, kwargs.pop('etag_scopes', self.etag_scopes)
+        )
+        etag = quote_etag(self.get_etag(request, scopes))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            reads = (
+                primary_reads() if recently_bumped(*scopes) else nullcontext()
+            )
+            with reads:
+                response = handler(request, *args, **kwargs)
+            if response.status_code == HTTP_200_OK:
+                response['ETag'] = etag
+        if self.etag_per_user or not request.user.is_anonymous:
+            patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if not self.etag_scopes:
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.etag_scopes:
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class AnonymousResponseCacheMixin:
+    """Cache list and retrieve responses served to anonymous users.
+
+    Keys hold the version of `cache_scope`, so bumping the version
+    invalidates every cached response at once. Only `cache_query_params`
+    take part in the key, other parameters must not change the response
+    for anonymous users.
+    """
+    cache_scope = None
+    cache_query_params = ()
+
+    def get_cache_key(self, request):
+        params = urlencode(sorted(
+            (name, value)
+            for name in self.cache_query_params
+            for value in request.query_params.getlist(name)
+        ))
+        signature = md5(
+            f'{request.get_host()}:{self.action}:{self.kwargs.get("pk")}:'
+            f'{params}'.encode()
+        ).hexdigest()
+        version = get_version(self.cache_scope)
+        return f'response:{self.cache_scope}:{version}:{signature}'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return handler(request, *args, **kwargs)
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        with primary_reads():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == HTTP_200_OK:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
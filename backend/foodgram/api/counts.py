@@ -0,0 +1,59 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+
+def exact_count(queryset):
+    return queryset.count()
+
+
+def estimated_count(queryset):
+    """Planner estimate of an unfiltered table's size, exact below a limit.
+
+    Filtered querysets, and databases other than PostgreSQL, count exactly:
+    plan estimates of a WHERE clause can be off by orders of magnitude.
+    """
+    connection = connections[queryset.db]
+    query = queryset.query
+    if connection.vendor != 'postgresql' or query.where or query.distinct:
+        return queryset.count()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table]
+        )
+        estimate = cursor.fetchone()[0]
+    if estimate < settings.PAGINATION_EXACT_COUNT_LIMIT:
+        return queryset.count()
+    return int(estimate)
+
+
+def cached_count(queryset):
+    """Exact count shared for a short time by identical filters."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = 'count:' + md5(repr((sql, params)).encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+COUNT_STRATEGIES = {
+    'exact': exact_count,
+    'estimated': estimated_count,
+    'cached': cached_count,
+}
+
+
+def get_count_strategy(view):
+    """Pick the strategy configured for `basename-action` or `basename`."""
+    configured = settings.PAGINATION_COUNT_STRATEGIES
+    basename = getattr(view, 'basename', None)
+    action = getattr(view, 'action', None)
+    name = configured.get(
+        f'{basename}-{action}', configured.get(basename, 'exact')
+    )
+    return COUNT_STRATEGIES[name]
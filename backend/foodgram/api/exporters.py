@@ -0,0 +1,164 @@
+import csv
+import io
+import json
+from concurrent import futures
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import BaseRenderer
+from rest_framework.status import HTTP_503_SERVICE_UNAVAILABLE
+
+TITLE = 'Cписок покупок:'
+HEADER = 'Название продукта - Кол-во/Ед.изм.'
+CHUNK_SIZE = 64 * 1024
+
+_pdf_executor = futures.ThreadPoolExecutor(
+    max_workers=settings.SHOPPING_LIST_PDF_WORKERS,
+    thread_name_prefix='shopping-list-pdf'
+)
+
+
+class ExportTimeoutError(APIException):
+    status_code = HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The shopping list is taking too long, try again later.'
+    default_code = 'export_timeout'
+
+
+class ShoppingListExporter(BaseRenderer):
+    """Base class for shopping list formats.
+
+    Exporters double as DRF renderers, so the format is negotiated by DRF
+    itself from the `format` query parameter or the `Accept` header.
+    Items are dicts with `name`, `measure` and `amount` keys.
+    """
+    charset = 'utf-8'
+    extension = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only used for error payloads, shopping lists are streamed.
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+    def stream(self, items):
+        raise NotImplementedError
+
+    def response(self, items):
+        content_type = self.media_type
+        if self.charset:
+            content_type = f'{content_type}; charset={self.charset}'
+        response = StreamingHttpResponse(
+            self.stream(items), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment;filename="shopping_list.{self.extension}"'
+        )
+        return response
+
+
+class TextExporter(ShoppingListExporter):
+    media_type = 'text/plain'
+    format = 'txt'
+    extension = 'txt'
+
+    def stream(self, items):
+        yield f'{TITLE}\n\n{HEADER}\n'
+        for item in items:
+            yield f'{item["name"]} - {item["amount"]}/{item["measure"]} \n'
+
+
+class CSVExporter(ShoppingListExporter):
+    media_type = 'text/csv'
+    format = 'csv'
+    extension = 'csv'
+
+    def stream(self, items):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['name', 'amount', 'measure'])
+        for item in items:
+            writer.writerow([item['name'], item['amount'], item['measure']])
+            if buffer.tell() >= CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+
+class JSONExporter(ShoppingListExporter):
+    media_type = 'application/json'
+    format = 'json'
+    extension = 'json'
+
+    def stream(self, items):
+        separator = ''
+        yield '['
+        for item in items:
+            yield separator + json.dumps(
+                {key: item[key] for key in ('name', 'amount', 'measure')},
+                ensure_ascii=False
+            )
+            separator = ','
+        yield ']'
+
+
+class PDFExporter(ShoppingListExporter):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    extension = 'pdf'
+    charset = None
+    font_size = 12
+
+    def response(self, items):
+        # Rendering runs on a bounded pool, so a burst of PDF downloads
+        # can't pin every request thread or pile up page buffers. It is
+        # done before the response starts, a failure once the headers
+        # are out would only truncate a successful download.
+        future = _pdf_executor.submit(self.render_pdf, list(items))
+        try:
+            content = future.result(
+                timeout=settings.SHOPPING_LIST_PDF_TIMEOUT
+            )
+        except futures.TimeoutError:
+            future.cancel()
+            raise ExportTimeoutError
+        return super().response(content)
+
+    def stream(self, content):
+        for start in range(0, len(content), CHUNK_SIZE):
+            yield content[start:start + CHUNK_SIZE]
+
+    def get_font(self):
+        font_path = settings.SHOPPING_LIST_PDF_FONT
+        if 'ShoppingListFont' not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(TTFont('ShoppingListFont', font_path))
+        return 'ShoppingListFont'
+
+    def render_pdf(self, items):
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        font = self.get_font()
+        height = A4[1]
+        line_height = self.font_size * 1.5
+        lines = [TITLE, '', HEADER] + [
+            f'{item["name"]} - {item["amount"]}/{item["measure"]}'
+            for item in items
+        ]
+        y = height - 2 * cm
+        pdf.setFont(font, self.font_size)
+        for line in lines:
+            if y < 2 * cm:
+                pdf.showPage()
+                pdf.setFont(font, self.font_size)
+                y = height - 2 * cm
+            pdf.drawString(2 * cm, y, line)
+            y -= line_height
+        pdf.save()
+        return buffer.getvalue()
+
+
+EXPORTERS = [TextExporter, CSVExporter, JSONExporter, PDFExporter]
@@ -1,17 +1,29 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
 
-from recipes.models import Recipe, Ingredient, Tag
+from recipes import reference
+from recipes.models import Recipe
+
+
+def tag_choices():
+    return [(tag.slug, tag.name) for tag in reference.tags.get().items]
+
+
+class StableOrderingFilter(OrderingFilter):
+    """OrderingFilter that breaks ties by id so pages don't overlap."""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and not {'id', '-id'} & set(ordering):
+            ordering = [*ordering, '-id']
+        return ordering
 
 
 class RecipeFilter(filters.FilterSet):
-    author = filters.CharFilter(
-        field_name='author__id',
-        lookup_expr='icontains'
-    )
-    tags = filters.ModelMultipleChoiceFilter(
+    author = filters.NumberFilter(field_name='author')
+    tags = filters.MultipleChoiceFilter(
         field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all()
+        choices=tag_choices
     )
     is_favorited = filters.BooleanFilter(method='get_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
@@ -35,16 +47,3 @@ class RecipeFilter(filters.FilterSet):
         if value and not user.is_anonymous:
             return queryset.filter(shopping_cart__user=user)
         return queryset
-
-
-class IngredientFilter(filters.FilterSet):
-    name = filters.CharFilter(
-        field_name='name',
-        lookup_expr='icontains'
-    )
-
-    class Meta:
-        model = Ingredient
-        fields = (
-            'name',
-        )
@@ -0,0 +1,252 @@
+from functools import lru_cache
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import fields, serializers
+from rest_framework.fields import empty, get_attribute
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+
+from core.fields import ImageSrcsetField, render_srcset
+
+SKIP = object()
+FALLBACK = object()
+
+
+class FallbackError(Exception):
+    """The instance has to be rendered by the regular serializer."""
+
+
+class UnsupportedFieldError(Exception):
+    pass
+
+
+class RenderState:
+    """Per-render context and serializers hosting method fields."""
+
+    def __init__(self, context):
+        self.context = context
+        self.request = context.get('request')
+        self._hosts = {}
+
+    def host(self, serializer_class):
+        host = self._hosts.get(serializer_class)
+        if host is None:
+            host = self._hosts[serializer_class] = serializer_class(
+                context=self.context
+            )
+        return host
+
+
+def represent_integer(value, state):
+    return int(value)
+
+
+def represent_string(value, state):
+    return str(value)
+
+
+def represent_value(value, state):
+    return value
+
+
+def represent_srcset(value, state):
+    return render_srcset(value, state.request)
+
+
+def compile_file(field):
+    use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+
+    def represent(value, state):
+        if not value:
+            return None
+        if not use_url:
+            return value.name
+        try:
+            url = value.url
+        except AttributeError:
+            return None
+        if state.request is not None:
+            return state.request.build_absolute_uri(url)
+        return url
+    return represent
+
+
+def compile_method(field):
+    serializer_class = type(field.parent)
+    method_name = field.method_name
+
+    def represent(value, state):
+        return getattr(state.host(serializer_class), method_name)(value)
+    return represent
+
+
+def compile_many(field):
+    if type(field).to_representation is not (
+        serializers.ListSerializer.to_representation
+    ):
+        raise UnsupportedFieldError(f'{type(field).__name__}')
+    child = Projection(field.child)
+
+    def represent(value, state):
+        if isinstance(value, models.Manager):
+            value = value.all()
+        return [child.render(item, state) for item in value]
+    return represent
+
+
+REPRESENTATIONS = {
+    fields.IntegerField.to_representation: represent_integer,
+    fields.CharField.to_representation: represent_string,
+    fields.ReadOnlyField.to_representation: represent_value,
+    ImageSrcsetField.to_representation: represent_srcset,
+}
+# Representations that never look at the serializer context.
+CONTEXT_FREE = (
+    fields.BooleanField.to_representation,
+)
+
+
+def compile_representation(field):
+    method = type(field).to_representation
+    if method in REPRESENTATIONS:
+        return REPRESENTATIONS[method]
+    if method in CONTEXT_FREE:
+        return lambda value, state: field.to_representation(value)
+    if method is fields.FileField.to_representation:
+        return compile_file(field)
+    if isinstance(field, serializers.SerializerMethodField):
+        return compile_method(field)
+    if isinstance(field, serializers.ListSerializer):
+        return compile_many(field)
+    if isinstance(field, serializers.Serializer):
+        return Projection(field).render
+    raise UnsupportedFieldError(
+        f'{type(field.parent).__name__}.{field.field_name}: '
+        f'{type(field).__name__}'
+    )
+
+
+def compile_getter(field, model):
+    attrs = field.source_attrs
+    if model is not None and len(attrs) == 1:
+        try:
+            model_field = model._meta.get_field(attrs[0])
+        except FieldDoesNotExist:
+            model_field = None
+        if (model_field is not None and model_field.concrete
+                and not model_field.is_relation):
+            return attrgetter(attrs[0])
+    return lambda instance: get_attribute(instance, attrs)
+
+
+def compile_default(field):
+    """What `Field.get_attribute` falls back to for a missing value."""
+    if field.default is not empty:
+        return FALLBACK if callable(field.default) else field.default
+    if field.allow_null:
+        return None
+    if not field.required:
+        return SKIP
+    return FALLBACK
+
+
+class Projection:
+    """Representation of a serializer compiled into a flat list of steps.
+
+    Fields are bound once, rendering is a loop of attribute lookups and
+    plain conversions with the semantics of `Serializer.to_representation`.
+    Only fields with a known representation are supported, method fields
+    are called on a serializer created once per render.
+    """
+
+    def __init__(self, serializer):
+        if type(serializer).to_representation is not (
+            serializers.Serializer.to_representation
+        ):
+            raise UnsupportedFieldError(f'{type(serializer).__name__}')
+        self.serializer_class = type(serializer)
+        model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+        self.steps = [
+            (field.field_name, compile_getter(field, model),
+             compile_representation(field), compile_default(field))
+            for field in serializer._readable_fields
+        ]
+
+    def render(self, instance, state):
+        ret = {}
+        for name, get, represent, default in self.steps:
+            try:
+                value = get(instance)
+            except (KeyError, AttributeError):
+                if default is SKIP:
+                    continue
+                if default is FALLBACK:
+                    raise FallbackError(name)
+                value = default
+            ret[name] = None if value is None else represent(value, state)
+        return ret
+
+    def render_many(self, instances, state):
+        if isinstance(instances, models.Manager):
+            instances = instances.all()
+        return [self.render(instance, state) for instance in instances]
+
+
+@lru_cache(maxsize=None)
+def get_projection(serializer_class):
+    """Compiled projection of `serializer_class`, None if unsupported."""
+    try:
+        return Projection(serializer_class(context={}))
+    except UnsupportedFieldError:
+        return None
+
+
+class ProjectedSerializer:
+    """Read-only stand-in for a serializer, rendered by its projection."""
+
+    def __init__(self, projection, instance, many=False, context=None):
+        self.projection = projection
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self.render()
+        return self._data
+
+    def render(self):
+        state = RenderState(self.context)
+        try:
+            if self.many:
+                return self.projection.render_many(self.instance, state)
+            return self.projection.render(self.instance, state)
+        except FallbackError:
+            return self.projection.serializer_class(
+                self.instance, many=self.many, context=self.context
+            ).data
+
+
+class ProjectedReadMixin:
+    """Serialize the responses of safe requests with compiled projections.
+
+    Serializers the projections don't support, and everything but plain
+    `get_serializer(instance, many=...)` calls, use DRF as usual.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        if (settings.PROJECTED_READS and len(args) == 1
+                and set(kwargs) <= {'many'}
+                and self.request.method in SAFE_METHODS):
+            projection = get_projection(self.get_serializer_class())
+            if projection is not None:
+                return ProjectedSerializer(
+                    projection, args[0], kwargs.get('many', False),
+                    self.get_serializer_context()
+                )
+        return super().get_serializer(*args, **kwargs)
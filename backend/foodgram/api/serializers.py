@@ -1,18 +1,21 @@
 from django.conf import settings
 from django.db import transaction
 from django.contrib.auth.models import AnonymousUser
-from django.core.paginator import Paginator
-from django.shortcuts import get_object_or_404
 from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 
-from core.fields import Base64ImageField
+from core.fields import (Base64ImageField, ImageSrcsetField,
+                         ReferencePrimaryKeyRelatedField)
 from recipes.models import (Ingredient, IngredientRecipe,
-                            Recipe, Tag)
+                            Recipe, Tag, TagRecipe)
+from recipes import reference
+from recipes.images import delete_image, schedule_variants
+from recipes.services import refresh_recipe_in_shopping_lists
 from users.models import User
 
 
 class RecipeSmallReadOnlySerialiazer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source='image_variants')
 
     class Meta:
         model = Recipe
@@ -20,6 +23,7 @@ class RecipeSmallReadOnlySerialiazer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_srcset',
             'cooking_time'
         ]
         read_only_fields = [
@@ -32,7 +36,6 @@ class RecipeSmallReadOnlySerialiazer(serializers.ModelSerializer):
 
 class SubscriptionSerializer(serializers.ModelSerializer):
     recipes = serializers.SerializerMethodField('paginated_recipes')
-    recipes_count = serializers.SerializerMethodField()
     is_subscribed = serializers.BooleanField(default=True)
 
     class Meta:
@@ -48,15 +51,20 @@ class SubscriptionSerializer(serializers.ModelSerializer):
             'recipes_count',
         ]
 
-    def get_recipes_count(self, obj: User):
-        return obj.recipes.count()
+    @staticmethod
+    def get_recipes_limit(request):
+        default_page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 6)
+        try:
+            limit = int(request.query_params.get('recipes_limit'))
+        except (TypeError, ValueError):
+            return default_page_size
+        return limit if limit > 0 else default_page_size
 
     def paginated_recipes(self, obj):
-        default_page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 6)
-        limit = self.context['request'].query_params.get('recipes_limit')
-        page_size = limit or default_page_size
-        paginator = Paginator(obj.recipes.all(), page_size)
-        recipes = paginator.page(1)
+        recipes = getattr(obj, 'latest_recipes', None)
+        if recipes is None:
+            limit = self.get_recipes_limit(self.context['request'])
+            recipes = obj.recipes.all()[:limit]
         serializer = RecipeSmallReadOnlySerialiazer(recipes, many=True)
         return serializer.data
 
@@ -87,7 +95,9 @@ class UserSerializer(serializers.ModelSerializer):
             'first_name',
             'last_name',
             'password',
-            'is_subscribed'
+            'is_subscribed',
+            'recipes_count',
+            'subscribers_count'
         ]
         read_only_fields = ['id', ]
         extra_kwargs = {
@@ -102,6 +112,8 @@ class UserSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         if isinstance(user, AnonymousUser):
             return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return User.objects.filter(pk=user.pk, subscriptions=obj).exists()
 
 
@@ -143,7 +155,12 @@ class RecipeSerializer(serializers.ModelSerializer):
         required=False
     )
     image = Base64ImageField()
-    ingredients = serializers.SerializerMethodField(read_only=True)
+    image_srcset = ImageSrcsetField(source='image_variants')
+    ingredients = IngredientQuantitySerializer(
+        source='recipe',
+        many=True,
+        read_only=True
+    )
 
     class Meta:
         model = Recipe
@@ -156,24 +173,27 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_srcset',
             'text',
-            'cooking_time'
+            'cooking_time',
+            'favorites_count',
+            'carts_count'
         ]
 
-    def get_ingredients(self, obj):
-        return IngredientQuantitySerializer(obj.recipe.all(),
-                                            many=True).data
-
     def get_is_favorited(self, obj):
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return user.favorites.filter(recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return user.shopping_cart.filter(recipe=obj).exists()
 
 
@@ -186,9 +206,9 @@ class RecipeCreateIngredientsSerializer(serializers.ModelSerializer):
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = ReferencePrimaryKeyRelatedField(
         many=True,
-        queryset=Tag.objects.all()
+        registry=reference.tags
     )
     author = UserSerializer(
         read_only=True,
@@ -216,18 +236,20 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             raise ValidationError({
                 'ingredients': 'We need at least one ingredient!'
             })
-        ingredients_list = []
+        ingredient_ids = [item['id'] for item in ingredients]
+        if len(set(ingredient_ids)) != len(ingredient_ids):
+            raise ValidationError({
+                'ingredients': 'Ingredients cannot be repeated!'
+            })
+        if any(int(item['amount']) <= 0 for item in ingredients):
+            raise ValidationError({
+                'amount': 'Amount of ingredient must be greater than 0!'
+            })
+        ingredients_by_id = reference.ingredients.get().by_id
+        if not all(pk in ingredients_by_id for pk in ingredient_ids):
+            raise NotFound()
         for item in ingredients:
-            ingredient = get_object_or_404(Ingredient, id=item['id'])
-            if ingredient in ingredients_list:
-                raise ValidationError({
-                    'ingredients': 'Ingredients cannot be repeated!'
-                })
-            if int(item['amount']) <= 0:
-                raise ValidationError({
-                    'amount': 'Amount of ingredient must be greater than 0!'
-                })
-            ingredients_list.append(ingredient)
+            item['ingredient'] = ingredients_by_id[item['id']]
         return value
 
     def validate_tags(self, value):
@@ -249,7 +271,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     def update_or_create(self, ingredients, recipe):
         IngredientRecipe.objects.bulk_create(
             [IngredientRecipe(
-                ingredient=Ingredient.objects.get(id=ingredient['id']),
+                ingredient=ingredient['ingredient'],
                 recipe=recipe,
                 amount=ingredient['amount']
             ) for ingredient in ingredients]
@@ -263,28 +285,83 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         recipe.tags.set(tags)
         self.update_or_create(recipe=recipe,
                               ingredients=ingredients)
+        schedule_variants(recipe)
         return recipe
 
+    def sync_tags(self, recipe, tags):
+        current = set(TagRecipe.objects.filter(
+            recipe=recipe).values_list('tag_id', flat=True))
+        wanted = {tag.id for tag in tags}
+        if current - wanted:
+            TagRecipe.objects.filter(
+                recipe=recipe, tag_id__in=current - wanted
+            ).delete()
+        TagRecipe.objects.bulk_create(
+            [TagRecipe(recipe=recipe, tag_id=tag_id)
+             for tag_id in wanted - current]
+        )
+
+    def sync_ingredients(self, recipe, ingredients):
+        """Write only the ingredient rows that differ from the request.
+
+        Returns ids of the ingredients that were added, changed or removed.
+        """
+        current = {
+            row.ingredient_id: row
+            for row in IngredientRecipe.objects.filter(recipe=recipe)
+        }
+        wanted = {item['ingredient'].id: item for item in ingredients}
+        removed = current.keys() - wanted.keys()
+        changed = []
+        for ingredient_id, row in current.items():
+            item = wanted.get(ingredient_id)
+            if item is not None and row.amount != item['amount']:
+                row.amount = item['amount']
+                changed.append(row)
+        added = [
+            IngredientRecipe(recipe=recipe,
+                             ingredient=item['ingredient'],
+                             amount=item['amount'])
+            for ingredient_id, item in wanted.items()
+            if ingredient_id not in current
+        ]
+        if removed:
+            IngredientRecipe.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        IngredientRecipe.objects.bulk_update(changed, ['amount'])
+        IngredientRecipe.objects.bulk_create(added)
+        return (removed
+                | {row.ingredient_id for row in changed}
+                | {row.ingredient_id for row in added})
+
     @transaction.atomic
     def update(self, instance, validated_data):
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredients')
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        old_image = instance.image.name
+        old_variants = instance.image_variants
+        image_changed = validated_data.get('image') is not None
+        if image_changed:
+            validated_data['image_variants'] = []
         instance = super().update(instance, validated_data)
         if tags:
-            instance.tags.clear()
-            instance.tags.set(tags)
+            self.sync_tags(instance, tags)
         if ingredients:
-            instance.ingredients.clear()
-            self.update_or_create(recipe=instance,
-                                  ingredients=ingredients)
-        if (instance.image is not None
-                and validated_data.get('image') is not None):
-            instance.image.delete()
+            touched = self.sync_ingredients(instance, ingredients)
+            if touched:
+                refresh_recipe_in_shopping_lists(instance, touched)
+        if image_changed:
+            delete_image(old_image, old_variants)
+            schedule_variants(instance)
         return instance
 
     def to_representation(self, instance):
         request = self.context.get('request')
         context = {'request': request}
+        instance = Recipe.objects.with_related().with_user_flags(
+            request.user
+        ).get(pk=instance.pk)
         return RecipeSerializer(instance,
                                 context=context).data
 
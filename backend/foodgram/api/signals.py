@@ -0,0 +1,100 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.versions import bump_version_on_commit, user_scope
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag, TagRecipe)
+from users.models import User
+from .authentication import USER_FIELDS, auth_scope
+
+# User fields rendered in recipe payloads, where the user is the author.
+AUTHOR_FIELDS = frozenset(('email', 'username', 'first_name', 'last_name'))
+# User fields rendered in the user's own payloads.
+PROFILE_FIELDS = AUTHOR_FIELDS | {'recipes_count', 'subscribers_count'}
+# User fields kept in cached token lookups, and the password, whose change
+# logs out every cached token.
+AUTH_FIELDS = frozenset(USER_FIELDS) - {'id'} | {'password'}
+
+
+@receiver(pre_save, sender=User)
+def remember_changed_fields(sender, instance, raw, update_fields, **kwargs):
+    """Record which fields the save writes anew, for the receivers below.
+
+    Logins only save `last_login`, which no cached payload contains.
+    """
+    if update_fields is not None:
+        changed = set(update_fields)
+    elif raw or instance._state.adding:
+        changed = None
+    else:
+        names = PROFILE_FIELDS | AUTH_FIELDS
+        saved = User.objects.filter(pk=instance.pk).values(*names).first()
+        changed = None if saved is None else {
+            name for name in names if saved[name] != getattr(instance, name)
+        }
+    instance._changed_fields = changed
+
+
+def user_fields_changed(instance, fields):
+    changed = instance.__dict__.get('_changed_fields')
+    return changed is None or not changed.isdisjoint(fields)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+@receiver(post_save, sender=TagRecipe)
+@receiver(post_delete, sender=TagRecipe)
+@receiver(m2m_changed, sender=TagRecipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_recipes_version(sender, **kwargs):
+    bump_version_on_commit('recipes')
+
+
+@receiver(post_save, sender=User)
+def bump_author_version(sender, instance, created, **kwargs):
+    # A new user has no recipes, deleted ones take theirs along.
+    if not created and user_fields_changed(instance, AUTHOR_FIELDS):
+        bump_version_on_commit('recipes')
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def bump_owner_version(sender, instance, **kwargs):
+    bump_version_on_commit(user_scope(instance.user_id))
+
+
+@receiver(post_save, sender=User)
+def bump_user_version(sender, instance, **kwargs):
+    if user_fields_changed(instance, PROFILE_FIELDS):
+        bump_version_on_commit(user_scope(instance.pk))
+
+
+@receiver(m2m_changed, sender=User.subscriptions.through)
+def bump_subscriber_version(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_version_on_commit(user_scope(instance.pk))
+        return
+    bump_version_on_commit(*(user_scope(pk) for pk in pk_set or ()))
+
+
+@receiver(post_delete, sender=Token)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_auth_version(sender, instance, **kwargs):
+    # Logout, password, `is_active` and staff changes drop cached tokens.
+    if sender is Token:
+        bump_version_on_commit(auth_scope(instance.user_id))
+    elif user_fields_changed(instance, AUTH_FIELDS):
+        bump_version_on_commit(auth_scope(instance.pk))
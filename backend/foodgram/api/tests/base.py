@@ -0,0 +1,67 @@
+import base64
+from io import BytesIO
+
+from django.core.cache import cache
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from api.authentication import token_cache
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+from users.models import User
+
+
+def image_data_uri():
+    buffer = BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class APIBaseTestCase(APITestCase):
+    """Test case with helpers to build users, recipes and clients."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        token_cache.clear()
+
+    @staticmethod
+    def create_user(name, **kwargs):
+        return User.objects.create_user(
+            email=f'{name}@example.com', username=name, first_name=name,
+            last_name=name, password='Pa55word-42', **kwargs
+        )
+
+    @staticmethod
+    def create_recipe(author, name, tags=(), ingredients=()):
+        recipe = Recipe.objects.create(
+            author=author, name=name, image='recipes/images/test.png',
+            text='Text', cooking_time=10
+        )
+        recipe.tags.set(tags)
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=recipe, ingredient=ingredient, amount=5)
+            for ingredient in ingredients
+        )
+        return recipe
+
+    @staticmethod
+    def create_reference():
+        tags = [
+            Tag.objects.create(name=name, color=color, slug=slug)
+            for name, color, slug in (('Завтрак', '#E26C2D', 'breakfast'),
+                                      ('Обед', '#49B64E', 'lunch'))
+        ]
+        ingredients = [
+            Ingredient.objects.create(name=name, measure='г')
+            for name in ('соль', 'сахар', 'масло')
+        ]
+        return tags, ingredients
+
+    def client_for(self, user):
+        client = self.client_class()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
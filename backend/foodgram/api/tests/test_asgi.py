@@ -0,0 +1,71 @@
+from django.core import signals
+from django.db import close_old_connections
+from django.test import override_settings
+
+from core.asgi import StreamingASGIHandler
+
+from .base import APIBaseTestCase
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class StreamingASGIHandlerTests(APIBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('reader')
+        _, ingredients = self.create_reference()
+        recipe = self.create_recipe(self.user, 'Recipe', (), ingredients)
+        self.client_for(self.user).post(
+            f'/api/recipes/{recipe.pk}/shopping_cart/'
+        )
+        self.token = self.user.auth_token.key
+        # Like the test client, keep the test transaction's connection.
+        signals.request_started.disconnect(close_old_connections)
+        signals.request_finished.disconnect(close_old_connections)
+        self.addCleanup(
+            signals.request_started.connect, close_old_connections
+        )
+        self.addCleanup(
+            signals.request_finished.connect, close_old_connections
+        )
+
+    async def get(self, path, query=b''):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        await StreamingASGIHandler()({
+            'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': query, 'scheme': 'http',
+            'server': ('testserver', 80), 'client': ('127.0.0.1', 1),
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization', f'Token {self.token}'.encode()),
+            ],
+        }, receive, send)
+        return messages
+
+    async def test_streams_queryset_exports(self):
+        for fmt in ('txt', 'csv', 'json', 'pdf'):
+            with self.subTest(format=fmt):
+                start, *body = await self.get(
+                    '/api/recipes/download_shopping_cart/',
+                    f'format={fmt}'.encode()
+                )
+                self.assertEqual(start['status'], 200)
+                self.assertGreater(len(body), 1)
+                self.assertTrue(b''.join(
+                    part.get('body', b'') for part in body
+                ))
+                self.assertFalse(body[-1].get('more_body', False))
+
+    async def test_regular_responses(self):
+        start, *body = await self.get('/api/users/me/')
+        self.assertEqual(start['status'], 200)
+        self.assertIn(b'"username":"reader"', b''.join(
+            part.get('body', b'') for part in body
+        ))
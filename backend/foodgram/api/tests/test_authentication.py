@@ -0,0 +1,116 @@
+import sys
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from api.authentication import (CachedTokenAuthentication, TokenCache,
+                                token_cache)
+from users.models import User
+
+from .base import APIBaseTestCase
+
+LOCMEM = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}}
+
+
+class CachedTokenTests(APIBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('author')
+        self.client = self.client_for(self.user)
+        # Warm the token cache.
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        self.key = self.client._credentials['HTTP_AUTHORIZATION'].split()[1]
+
+    def test_me_shows_fresh_counters(self):
+        self.create_recipe(self.user, 'Recipe')
+
+        response = self.client.get('/api/users/me/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['recipes_count'], 1)
+
+    def test_set_password_keeps_counters(self):
+        self.create_recipe(self.user, 'Recipe')
+
+        response = self.client.post('/api/users/set_password/', {
+            'current_password': 'Pa55word-42',
+            'new_password': 'N3w-password',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(user.check_password('N3w-password'))
+        self.assertEqual(user.recipes_count, 1)
+
+    def test_cached_user_save_keeps_other_fields(self):
+        self.create_recipe(self.user, 'Recipe')
+        User.objects.filter(pk=self.user.pk).update(first_name='Renamed')
+
+        user, _ = CachedTokenAuthentication().authenticate_credentials(
+            self.key
+        )
+        self.assertEqual(user.recipes_count, 1)
+        user.save()
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.recipes_count, 1)
+        self.assertEqual(user.first_name, 'Renamed')
+
+    def test_snapshot_leaves_password_out(self):
+        value = token_cache.get(self.key)
+        self.assertIsNotNone(value)
+        (user_fields, _), _, _ = value
+        self.assertNotIn('password', user_fields)
+
+        user, _ = CachedTokenAuthentication().authenticate_credentials(
+            self.key
+        )
+        self.assertIn('password', user.get_deferred_fields())
+        self.assertTrue(user.check_password('Pa55word-42'))
+
+    @override_settings(CACHES=LOCMEM)
+    def test_shared_snapshot_leaves_password_out(self):
+        shared = TokenCache(max_size=10, ttl=60, shared=True)
+        shared.set(self.key, self.user, self.user.auth_token)
+        (user_fields, user_values), _, _ = cache.get(f'token:{self.key}')
+        self.assertNotIn('password', user_fields)
+        self.assertNotIn(self.user.password, user_values)
+
+    def test_password_change_invalidates_snapshot(self):
+        self.user.set_password('N3w-password')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertIsNone(token_cache.get(self.key))
+
+
+class TokenCacheCountersTests(SimpleTestCase):
+
+    @mock.patch('api.authentication.get_version', return_value=1)
+    def test_concurrent_lookups_are_all_counted(self, get_version):
+        tokens = TokenCache(max_size=10, ttl=60, shared=False)
+        tokens._set_local('hit', ((['id'], [1]), None, 1))
+        lookups = 2000
+
+        def look_up():
+            for _ in range(lookups):
+                tokens.get('hit')
+                tokens.get('miss')
+
+        # Switch threads as often as possible, so races show up.
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-6)
+        threads = [threading.Thread(target=look_up) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        metrics = tokens.metrics()
+        self.assertEqual(metrics['hits'], 4 * lookups)
+        self.assertEqual(metrics['misses'], 4 * lookups)
+        self.assertEqual(metrics['hit_rate'], 0.5)
@@ -0,0 +1,141 @@
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+
+from core.versions import get_versions, user_scope
+from recipes.models import Favorite, Recipe
+from recipes.services import adjust_counters, reconcile_counters
+from users.models import User
+
+from .base import APIBaseTestCase
+
+
+class CounterVersionsTests(APIBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.reader = self.create_user('reader')
+        self.author = self.create_user('author')
+        self.recipe = self.create_recipe(self.author, 'Recipe')
+        self.client = self.client_for(self.reader)
+
+    def post(self, client, url):
+        with self.captureOnCommitCallbacks(execute=True):
+            return client.post(url)
+
+    def test_favorite_bumps_only_the_user(self):
+        scopes = ('recipes', user_scope(self.reader.pk),
+                  user_scope(self.author.pk))
+        before = get_versions(*scopes)
+
+        response = self.post(
+            self.client, f'/api/recipes/{self.recipe.pk}/favorite/'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        recipes, reader, author = (
+            new != old for old, new in zip(before, get_versions(*scopes))
+        )
+        self.assertEqual((recipes, reader, author), (False, True, False))
+
+    def test_me_shows_new_subscriber(self):
+        author_client = self.client_for(self.author)
+        response = author_client.get('/api/users/me/')
+        self.assertEqual(response.data['subscribers_count'], 0)
+
+        self.post(self.client, f'/api/users/{self.author.pk}/subscribe/')
+
+        response = author_client.get(
+            '/api/users/me/', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['subscribers_count'], 1)
+
+    def test_recipe_etags_expire(self):
+        url = f'/api/recipes/{self.recipe.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url)['ETag'], etag)
+
+        later = time.time() + settings.COUNTERS_MAX_AGE
+        with mock.patch('api.cache.time.time', return_value=later):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+
+class CounterColumnsTests(APIBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.reader = self.create_user('reader')
+        self.author = self.create_user('author')
+        self.recipe = self.create_recipe(self.author, 'Recipe')
+        self.client = self.client_for(self.reader)
+
+    def counters(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        author = User.objects.get(pk=self.author.pk)
+        return {
+            'favorites_count': recipe.favorites_count,
+            'carts_count': recipe.carts_count,
+            'recipes_count': author.recipes_count,
+            'subscribers_count': author.subscribers_count,
+        }
+
+    def test_favorite_and_cart(self):
+        for action, counter in (('favorite', 'favorites_count'),
+                                ('shopping_cart', 'carts_count')):
+            with self.subTest(action):
+                url = f'/api/recipes/{self.recipe.pk}/{action}/'
+                self.assertEqual(self.client.post(url).status_code, 201)
+                self.assertEqual(self.counters()[counter], 1)
+                self.assertEqual(self.client.post(url).status_code, 400)
+                self.assertEqual(self.counters()[counter], 1)
+                self.assertEqual(self.client.delete(url).status_code, 204)
+                self.assertEqual(self.counters()[counter], 0)
+
+    def test_subscribe(self):
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertEqual(self.counters()['subscribers_count'], 1)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.counters()['subscribers_count'], 0)
+
+    def test_recipe_create_and_delete(self):
+        self.assertEqual(self.counters()['recipes_count'], 1)
+        other = self.create_recipe(self.author, 'Other')
+        self.assertEqual(self.counters()['recipes_count'], 2)
+        other.delete()
+        self.assertEqual(self.counters()['recipes_count'], 1)
+
+    def test_decrement_stops_at_zero(self):
+        adjust_counters(Recipe, self.recipe.pk, favorites_count=-1)
+        self.assertEqual(self.counters()['favorites_count'], 0)
+
+    def test_reconcile_counters(self):
+        Favorite.objects.create(user=self.reader, recipe=self.recipe)
+        self.reader.subscriptions.add(self.author)
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            favorites_count=0, carts_count=3
+        )
+        User.objects.filter(pk=self.author.pk).update(
+            recipes_count=7, subscribers_count=0
+        )
+        version = get_versions('recipes')
+        stdout = StringIO()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_counters', stdout=stdout)
+
+        self.assertEqual(self.counters(), {
+            'favorites_count': 1, 'carts_count': 0,
+            'recipes_count': 1, 'subscribers_count': 1,
+        })
+        self.assertIn('recipe.favorites_count: 1 rows fixed',
+                      stdout.getvalue())
+        self.assertIn('user.recipes_count: 1 rows fixed', stdout.getvalue())
+        self.assertNotEqual(get_versions('recipes'), version)
+        self.assertEqual(set(reconcile_counters().values()), {0})
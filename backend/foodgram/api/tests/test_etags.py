@@ -0,0 +1,82 @@
+from unittest import mock
+
+from recipes.models import Favorite, Tag
+
+from .base import APIBaseTestCase
+
+
+class ConditionalGetTests(APIBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.reader = self.create_user('reader')
+        self.client = self.client_for(self.reader)
+        self.recipe = self.create_recipe(self.author, 'Recipe')
+        # Keep recipe tags in one `etag_max_age` bucket.
+        patcher = mock.patch('api.cache.time')
+        patcher.start().time.return_value = 0
+        self.addCleanup(patcher.stop)
+
+    def get_etag(self, url, client=None):
+        response = (client or self.client).get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        return response['ETag']
+
+    def assert_not_modified(self, url, etag, client=None):
+        response = (client or self.client).get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def assert_modified(self, url, etag, client=None):
+        response = (client or self.client).get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_matching_etag_is_not_modified(self):
+        for url in ('/api/recipes/', f'/api/recipes/{self.recipe.pk}/',
+                    '/api/tags/', '/api/ingredients/', '/api/users/me/'):
+            with self.subTest(url):
+                self.assert_not_modified(url, self.get_etag(url))
+
+    def test_recipe_change_modifies_recipes(self):
+        etag = self.get_etag('/api/recipes/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_recipe(self.author, 'Other')
+        self.assert_modified('/api/recipes/', etag)
+
+    def test_favorite_modifies_recipes_for_its_user_only(self):
+        author_client = self.client_for(self.author)
+        etag = self.get_etag('/api/recipes/')
+        author_etag = self.get_etag('/api/recipes/', author_client)
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.reader, recipe=self.recipe)
+        self.assert_modified('/api/recipes/', etag)
+        self.assert_not_modified('/api/recipes/', author_etag, author_client)
+
+    def test_profile_change_modifies_me(self):
+        etag = self.get_etag('/api/users/me/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reader.first_name = 'Renamed'
+            self.reader.save()
+        self.assert_modified('/api/users/me/', etag)
+
+    def test_new_tag_modifies_tags(self):
+        etag = self.get_etag('/api/tags/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Ужин', color='#8775D2', slug='dinner')
+        self.assert_modified('/api/tags/', etag)
+
+    def test_etags_differ_by_user_and_query(self):
+        etags = {
+            self.get_etag('/api/recipes/'),
+            self.get_etag('/api/recipes/', self.client_for(self.author)),
+            self.get_etag('/api/recipes/', self.client_class()),
+            self.get_etag('/api/recipes/?is_favorited=1'),
+        }
+        self.assertEqual(len(etags), 4)
+
+    def test_authenticated_responses_vary_on_authorization(self):
+        response = self.client.get('/api/tags/')
+        self.assertIn('Authorization', response['Vary'])
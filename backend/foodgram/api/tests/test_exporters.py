@@ -0,0 +1,63 @@
+from threading import Event
+from unittest import mock
+
+from django.test import override_settings
+
+from api.exporters import PDFExporter
+
+from .base import APIBaseTestCase
+
+
+class ShoppingListExportTests(APIBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('cook')
+        _, ingredients = self.create_reference()
+        recipe = self.create_recipe(
+            self.user, 'Каша', ingredients=ingredients
+        )
+        self.client = self.client_for(self.user)
+        self.client.post(f'/api/recipes/{recipe.pk}/shopping_cart/')
+
+    def get(self, fmt):
+        return self.client.get(
+            f'/api/recipes/download_shopping_cart/?format={fmt}'
+        )
+
+    def download(self, fmt):
+        response = self.get(fmt)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_text(self):
+        content = self.download('txt').decode()
+
+        self.assertIn('сахар - 5/г', content)
+
+    def test_pdf_embeds_cyrillic_font(self):
+        content = self.download('pdf')
+
+        self.assertTrue(content.startswith(b'%PDF'))
+        self.assertIn(b'DejaVuSans', content)
+
+    @override_settings(SHOPPING_LIST_PDF_TIMEOUT=0.01)
+    def test_pdf_timeout_is_unavailable(self):
+        released = Event()
+        self.addCleanup(released.set)
+
+        with mock.patch.object(PDFExporter, 'render_pdf',
+                               side_effect=lambda items: released.wait(5)):
+            response = self.get('pdf')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.streaming)
+
+    def test_pdf_render_error_is_server_error(self):
+        self.client.raise_request_exception = False
+
+        with mock.patch.object(PDFExporter, 'render_pdf',
+                               side_effect=ValueError('broken font')):
+            response = self.get('pdf')
+
+        self.assertEqual(response.status_code, 500)
@@ -0,0 +1,27 @@
+from recipes.models import Ingredient
+from .base import APIBaseTestCase
+
+
+class IngredientSearchTests(APIBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'сахар {number:02}', measure='г')
+            for number in range(20)
+        )
+
+    def search(self, query):
+        response = self.client.get(f'/api/ingredients/?name={query}')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_limit(self):
+        self.assertEqual(len(self.search('сах&limit=5')), 5)
+
+    def test_non_positive_limit_is_ignored(self):
+        for limit in ('0', '-1', 'x'):
+            with self.subTest(limit=limit):
+                self.assertEqual(
+                    len(self.search(f'сах&limit={limit}')), 20
+                )
@@ -0,0 +1,93 @@
+import json
+from base64 import urlsafe_b64encode
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.counts import (COUNT_STRATEGIES, estimated_count, exact_count,
+                        get_count_strategy)
+from api.views import UserViewSet
+from users.models import User
+
+from .base import APIBaseTestCase
+
+
+def cursor(values):
+    return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+class KeysetPaginationTests(APIBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        author = self.create_user('author')
+        for number in range(5):
+            self.create_recipe(author, f'Recipe {number}')
+
+    def test_pages_follow_the_cursor(self):
+        names = []
+        url = '/api/recipes/?cursor=&limit=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            names += [recipe['name'] for recipe in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(names, [f'Recipe {number}'
+                                 for number in reversed(range(5))])
+
+    def test_invalid_cursors_are_not_found(self):
+        for value in ('not base64!', cursor({'a': 1}), cursor([1]),
+                      cursor(['yesterday', 1]), cursor(['2022-12-01', 'x']),
+                      cursor(['2022-12-01', [1]]), cursor([None, 1])):
+            with self.subTest(cursor=value):
+                response = self.client.get(f'/api/recipes/?cursor={value}')
+                self.assertEqual(response.status_code, 404)
+
+
+@override_settings(PAGINATION_EXACT_COUNT_LIMIT=0)
+class CountStrategyTests(APIBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.reader = self.create_user('reader')
+        self.authors = [self.create_user(f'author{number}')
+                        for number in range(3)]
+        self.reader.subscriptions.add(*self.authors[:2])
+
+    def test_strategies_by_action(self):
+        for action, strategy in (('list', estimated_count),
+                                 ('subscriptions', exact_count)):
+            with self.subTest(action):
+                view = UserViewSet(basename='users', action=action)
+                self.assertIs(get_count_strategy(view), strategy)
+
+    def test_subscriptions_count_is_exact(self):
+        estimated = mock.Mock(side_effect=AssertionError)
+        with mock.patch.dict(COUNT_STRATEGIES, estimated=estimated):
+            response = self.client_for(self.reader).get(
+                '/api/users/subscriptions/'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_filtered_queryset_is_counted_exactly(self):
+        queryset = User.objects.filter(username__startswith='author')
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(estimated_count(queryset), 3)
+        self.assertEqual(len(context), 1)
+        self.assertNotIn('pg_class', context[0]['sql'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Needs PostgreSQL.')
+    def test_unfiltered_table_is_estimated(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {User._meta.db_table}')
+        User.objects.bulk_create(
+            User(email=f'extra{number}@example.com',
+                 username=f'extra{number}')
+            for number in range(5)
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(estimated_count(User.objects.all()), 4)
+        self.assertIn('pg_class', context[0]['sql'])
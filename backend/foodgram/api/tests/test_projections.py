@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from api.projections import RenderState, get_projection
+from api.renderers import FastJSONRenderer
+from api.serializers import (IngredientSerializer, RecipeSerializer,
+                             SubscriptionSerializer, TagSerializer,
+                             UserSerializer)
+from recipes import reference
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import User
+
+from .base import APIBaseTestCase
+
+# Values the renderers have to encode alike, besides real responses.
+RENDERER_SAMPLES = {
+    'strings': ['Щи да каша', '\u2028\u2029', '\x00\x1f"\\/\t\n',
+                '\U0001f372', gettext_lazy('Not found.')],
+    'numbers': [0, -1, 2 ** 63 - 1, True, False, None, Decimal('12.50')],
+    'big integers': [2 ** 64],
+    'datetimes': [
+        datetime(2022, 12, 1, 10, 5, 3, 123456, tzinfo=timezone.utc),
+        datetime(2022, 12, 1, 10, 5, 3),
+    ],
+    'containers': [{1: 'int', None: 'none'}, {'a': ()}, [], {}],
+}
+
+
+class ProjectionsTests(APIBaseTestCase):
+    """Compiled projections and the fast renderer match DRF byte for byte."""
+
+    def setUp(self):
+        super().setUp()
+        self.drf, self.fast = JSONRenderer(), FastJSONRenderer()
+        self.reader = self.create_user('reader')
+        self.author = self.create_user('author')
+        tags, ingredients = self.create_reference()
+        recipes = [
+            self.create_recipe(self.author, 'Recipe', tags, ingredients),
+            self.create_recipe(self.author, 'Untagged'),
+            self.create_recipe(self.reader, 'Own', tags[:1], ingredients[1:]),
+        ]
+        recipes[0].image_variants = [
+            {'format': 'webp', 'width': 320,
+             'name': 'recipes/images/variants/test_320.webp'}
+        ]
+        recipes[0].save()
+        self.reader.subscriptions.add(self.author)
+        Favorite.objects.create(user=self.reader, recipe=recipes[0])
+        ShoppingCart.objects.create(user=self.reader, recipe=recipes[1])
+
+    @staticmethod
+    def get_request(user):
+        request = Request(RequestFactory().get('/api/'))
+        request.user = user
+        return request
+
+    def get_cases(self):
+        for viewer in (AnonymousUser(), self.reader):
+            name = 'anonymous' if viewer.is_anonymous else 'user'
+            recipes = list(
+                Recipe.objects.with_related().with_user_flags(viewer)
+                .order_by('-created', '-id')
+            )
+            yield f'recipes, {name}', RecipeSerializer, viewer, recipes
+            users = list(User.objects.order_by('email'))
+            yield f'users, {name}', UserSerializer, viewer, users
+        yield 'me', UserSerializer, self.reader, self.reader
+        authors = list(self.reader.subscriptions.order_by('email'))
+        latest_recipes = {author.pk: [] for author in authors}
+        for recipe in Recipe.objects.latest_by_author(
+            authors, SubscriptionSerializer.get_recipes_limit(
+                self.get_request(self.reader)
+            )
+        ):
+            latest_recipes[recipe.author_id].append(recipe)
+        for author in authors:
+            author.latest_recipes = latest_recipes[author.pk]
+        yield 'subscriptions', SubscriptionSerializer, self.reader, authors
+        yield 'tags', TagSerializer, self.reader, reference.tags.get().items
+        yield ('ingredients', IngredientSerializer, self.reader,
+               reference.ingredients.get().items)
+
+    def test_renderers_match(self):
+        for name, sample in RENDERER_SAMPLES.items():
+            with self.subTest(name):
+                self.assertEqual(
+                    self.fast.render(sample), self.drf.render(sample)
+                )
+
+    def test_projections_match_serializers(self):
+        for name, serializer_class, user, instance in self.get_cases():
+            with self.subTest(name):
+                projection = get_projection(serializer_class)
+                self.assertIsNotNone(
+                    projection, f'{serializer_class.__name__} not compiled'
+                )
+                many = isinstance(instance, (list, tuple))
+                context = {'request': self.get_request(user)}
+                expected = self.drf.render(
+                    serializer_class(instance, many=many, context=context).data
+                )
+                state = RenderState(context)
+                data = (projection.render_many(instance, state) if many
+                        else projection.render(instance, state))
+                self.assertEqual(self.fast.render(data), expected)
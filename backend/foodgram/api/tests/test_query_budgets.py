@@ -0,0 +1,106 @@
+import shutil
+import tempfile
+
+from django.test import override_settings
+
+from .base import APIBaseTestCase, image_data_uri
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(QUERY_BUDGET_STRICT=True, MEDIA_ROOT=MEDIA_ROOT)
+class QueryBudgetTests(APIBaseTestCase):
+    """Main actions stay within their `query_budgets`.
+
+    Over budget requests raise `QueryBudgetExceededError`, which the test
+    client re-raises. Pages hold several rows, so N+1 queries show up.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        super().setUp()
+        self.tags, self.ingredients = self.create_reference()
+        self.user = self.create_user('reader')
+        self.authors = [self.create_user(f'author{number}')
+                        for number in range(3)]
+        for author in self.authors:
+            self.user.subscriptions.add(author)
+            for number in range(3):
+                recipe = self.create_recipe(
+                    author, f'{author.username} {number}', self.tags,
+                    self.ingredients
+                )
+        self.recipe = recipe
+        self.client = self.client_for(self.user)
+
+    def assert_ok(self, response, status=200):
+        self.assertEqual(
+            response.status_code, status, getattr(response, 'data', None)
+        )
+
+    def recipe_data(self):
+        return {
+            'name': 'New',
+            'text': 'Text',
+            'cooking_time': 5,
+            'image': image_data_uri(),
+            'tags': [tag.pk for tag in self.tags],
+            'ingredients': [{'id': ingredient.pk, 'amount': 3}
+                            for ingredient in self.ingredients],
+        }
+
+    def test_user_reads(self):
+        author = self.authors[0]
+        for client in (self.client_class(), self.client):
+            with self.subTest(anonymous=client is not self.client):
+                self.assert_ok(client.get('/api/users/'))
+                self.assert_ok(client.get(f'/api/users/{author.pk}/'))
+        self.assert_ok(self.client.get('/api/users/me/'))
+        self.assert_ok(self.client.get('/api/users/subscriptions/'))
+
+    def test_subscribe(self):
+        author = self.create_user('author')
+        self.create_recipe(author, 'Recipe')
+        url = f'/api/users/{author.pk}/subscribe/'
+        self.assert_ok(self.client.post(url), 201)
+        self.assert_ok(self.client.delete(url), 204)
+
+    def test_recipe_reads(self):
+        for client in (self.client_class(), self.client):
+            with self.subTest(anonymous=client is not self.client):
+                self.assert_ok(client.get('/api/recipes/'))
+                self.assert_ok(client.get('/api/recipes/?cursor='))
+                self.assert_ok(
+                    client.get(f'/api/recipes/{self.recipe.pk}/')
+                )
+                self.assert_ok(client.get('/api/tags/'))
+                self.assert_ok(client.get('/api/ingredients/'))
+                self.assert_ok(client.get('/api/ingredients/?name=с'))
+
+    def test_recipe_writes(self):
+        response = self.client.post(
+            '/api/recipes/', self.recipe_data(), format='json'
+        )
+        self.assert_ok(response, 201)
+        url = f'/api/recipes/{response.data["id"]}/'
+        data = self.recipe_data()
+        data['ingredients'] = data['ingredients'][:2]
+        self.assert_ok(self.client.patch(url, data, format='json'))
+        self.assert_ok(self.client.delete(url), 204)
+
+    def test_favorite_and_shopping_cart(self):
+        for action in ('favorite', 'shopping_cart'):
+            url = f'/api/recipes/{self.recipe.pk}/{action}/'
+            with self.subTest(action=action):
+                self.assert_ok(self.client.post(url), 201)
+        self.assert_ok(
+            self.client.get('/api/recipes/download_shopping_cart/')
+        )
+        for action in ('favorite', 'shopping_cart'):
+            url = f'/api/recipes/{self.recipe.pk}/{action}/'
+            with self.subTest(action=action):
+                self.assert_ok(self.client.delete(url), 204)
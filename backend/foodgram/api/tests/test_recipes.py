@@ -0,0 +1,260 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.serializers import RecipeCreateSerializer
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, TagRecipe)
+
+from .base import APIBaseTestCase, image_data_uri
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+@mock.patch('api.serializers.schedule_variants')
+class RecipeImageTest(APIBaseTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('author')
+        self.recipe = self.create_recipe(self.user, 'Recipe')
+        self.old_image = default_storage.save(
+            'recipes/images/old.png', ContentFile(b'old')
+        )
+        self.old_variant = default_storage.save(
+            'recipes/images/variants/old_320.webp', ContentFile(b'old')
+        )
+        self.recipe.image = self.old_image
+        self.recipe.image_variants = [
+            {'format': 'webp', 'width': 320, 'name': self.old_variant}
+        ]
+        self.recipe.save()
+        self.url = f'/api/recipes/{self.recipe.pk}/'
+
+    def test_old_image_is_deleted_after_commit(self, schedule_variants):
+        client = self.client_for(self.user)
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = client.patch(
+                self.url, {'image': image_data_uri()}, format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertTrue(default_storage.exists(self.old_image))
+        self.assertTrue(default_storage.exists(self.old_variant))
+        for callback in callbacks:
+            callback()
+        self.assertFalse(default_storage.exists(self.old_image))
+        self.assertFalse(default_storage.exists(self.old_variant))
+
+    def test_rolled_back_update_keeps_old_image(self, schedule_variants):
+        serializer = RecipeCreateSerializer(
+            self.recipe, data={'image': image_data_uri()}, partial=True
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(DatabaseError):
+                with transaction.atomic():
+                    serializer.save()
+                    raise DatabaseError('rollback')
+        self.assertEqual(callbacks, [])
+        self.assertTrue(default_storage.exists(self.old_image))
+        self.assertTrue(default_storage.exists(self.old_variant))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+@mock.patch('api.serializers.schedule_variants')
+class RecipeIngredientsTest(APIBaseTestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('author')
+        self.client = self.client_for(self.user)
+        self.tags, self.ingredients = self.create_reference()
+
+    def recipe_data(self, ingredients, name='New'):
+        return {
+            'name': name,
+            'text': 'Text',
+            'cooking_time': 5,
+            'image': image_data_uri(),
+            'tags': [tag.pk for tag in self.tags],
+            'ingredients': ingredients,
+        }
+
+    def post(self, ingredients, name='New'):
+        return self.client.post(
+            '/api/recipes/', self.recipe_data(ingredients, name),
+            format='json'
+        )
+
+    def test_repeated_ingredients_are_rejected(self, schedule_variants):
+        salt = self.ingredients[0]
+        response = self.post([{'id': salt.pk, 'amount': 1},
+                              {'id': salt.pk, 'amount': 2}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_unknown_ingredient_is_not_found(self, schedule_variants):
+        response = self.post([{'id': self.ingredients[0].pk, 'amount': 1},
+                              {'id': 0, 'amount': 1}])
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_amount_must_be_positive(self, schedule_variants):
+        response = self.post([{'id': self.ingredients[0].pk, 'amount': 0}])
+        self.assertEqual(response.status_code, 400)
+
+    def test_queries_do_not_grow_with_ingredients(self, schedule_variants):
+        ingredients = self.ingredients + [
+            Ingredient.objects.create(name=f'Ingredient {number}',
+                                      measure='г')
+            for number in range(37)
+        ]
+        # Warm up the token and reference caches first.
+        self.post([{'id': ingredients[0].pk, 'amount': 2}], 'Warm up')
+        queries = []
+        for count in (3, 40):
+            data = [{'id': ingredient.pk, 'amount': 2}
+                    for ingredient in ingredients[:count]]
+            with CaptureQueriesContext(connection) as context:
+                response = self.post(data, f'New {count}')
+            self.assertEqual(response.status_code, 201, response.data)
+            self.assertEqual(len(response.data['ingredients']), count)
+            queries.append(len(context))
+        self.assertEqual(queries[0], queries[1])
+
+
+class RecipeUpdateTest(APIBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('author')
+        self.client = self.client_for(self.user)
+        self.tags, self.ingredients = self.create_reference()
+        self.salt, self.sugar, self.butter = self.ingredients
+        self.recipe = self.create_recipe(
+            self.user, 'Recipe', self.tags[:1], [self.salt, self.sugar]
+        )
+        self.url = f'/api/recipes/{self.recipe.pk}/'
+
+    def rows(self):
+        return {
+            row.ingredient_id: row
+            for row in IngredientRecipe.objects.filter(recipe=self.recipe)
+        }
+
+    def patch(self, data):
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def test_only_changed_ingredient_rows_are_written(self):
+        before = self.rows()
+        self.patch({'ingredients': [
+            {'id': self.salt.pk, 'amount': 5},
+            {'id': self.sugar.pk, 'amount': 8},
+            {'id': self.butter.pk, 'amount': 1},
+        ]})
+        after = self.rows()
+        self.assertEqual(
+            {pk: row.amount for pk, row in after.items()},
+            {self.salt.pk: 5, self.sugar.pk: 8, self.butter.pk: 1}
+        )
+        self.assertEqual(after[self.salt.pk].pk, before[self.salt.pk].pk)
+        self.assertEqual(after[self.sugar.pk].pk, before[self.sugar.pk].pk)
+
+    def test_removed_ingredients_are_deleted(self):
+        kept = self.rows()[self.sugar.pk]
+        self.patch({'ingredients': [{'id': self.sugar.pk, 'amount': 5}]})
+        self.assertEqual(list(self.rows()), [self.sugar.pk])
+        self.assertEqual(self.rows()[self.sugar.pk].pk, kept.pk)
+
+    def test_tags_are_reconciled(self):
+        kept = TagRecipe.objects.get(recipe=self.recipe, tag=self.tags[0])
+        self.patch({'tags': [tag.pk for tag in self.tags]})
+        rows = TagRecipe.objects.filter(recipe=self.recipe)
+        self.assertEqual({row.tag_id for row in rows},
+                         {tag.pk for tag in self.tags})
+        self.assertIn(kept.pk, {row.pk for row in rows})
+
+        self.patch({'tags': [self.tags[1].pk]})
+        self.assertEqual(
+            list(TagRecipe.objects.filter(recipe=self.recipe)
+                 .values_list('tag_id', flat=True)),
+            [self.tags[1].pk]
+        )
+
+    def test_partial_update_keeps_tags_and_ingredients(self):
+        self.patch({'name': 'Renamed'})
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.name, 'Renamed')
+        self.assertEqual(set(self.rows()), {self.salt.pk, self.sugar.pk})
+        self.assertEqual(
+            list(self.recipe.tags.values_list('pk', flat=True)),
+            [self.tags[0].pk]
+        )
+
+
+class RecipeRelationsTest(APIBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.reader = self.create_user('reader')
+        self.client = self.client_for(self.reader)
+        self.soup, self.stew, self.pie = (
+            self.create_recipe(self.author, name)
+            for name in ('Soup', 'Stew', 'Pie')
+        )
+        Favorite.objects.create(user=self.reader, recipe=self.soup)
+        Favorite.objects.create(user=self.author, recipe=self.stew)
+        ShoppingCart.objects.create(user=self.reader, recipe=self.stew)
+
+    def names(self, query, client=None):
+        response = (client or self.client).get(f'/api/recipes/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return {recipe['name'] for recipe in response.data['results']}
+
+    def test_filters(self):
+        self.assertEqual(self.names('is_favorited=1'), {'Soup'})
+        self.assertEqual(self.names('is_in_shopping_cart=1'), {'Stew'})
+        self.assertEqual(
+            self.names('is_favorited=1&is_in_shopping_cart=1'), set()
+        )
+        self.assertEqual(self.names('is_favorited=0'),
+                         {'Soup', 'Stew', 'Pie'})
+
+    def test_filters_are_ignored_for_anonymous(self):
+        self.assertEqual(
+            self.names('is_favorited=1', self.client_class()),
+            {'Soup', 'Stew', 'Pie'}
+        )
+
+    def test_flags(self):
+        response = self.client.get('/api/recipes/')
+        flags = {
+            recipe['name']: (recipe['is_favorited'],
+                             recipe['is_in_shopping_cart'])
+            for recipe in response.data['results']
+        }
+        self.assertEqual(flags, {
+            'Soup': (True, False),
+            'Stew': (False, True),
+            'Pie': (False, False),
+        })
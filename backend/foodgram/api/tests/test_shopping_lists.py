@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from recipes.models import IngredientRecipe, ShoppingCartIngredient
+
+from .base import APIBaseTestCase
+
+
+class ShoppingListTotalsTests(APIBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.cook = self.create_user('cook')
+        self.client = self.client_for(self.cook)
+        _, (self.salt, self.sugar, self.butter) = self.create_reference()
+        self.porridge = self.create_recipe(
+            self.author, 'Porridge', ingredients=[self.salt, self.sugar]
+        )
+        self.pancakes = self.create_recipe(
+            self.author, 'Pancakes', ingredients=[self.sugar, self.butter]
+        )
+
+    def totals(self, user=None):
+        return dict(
+            ShoppingCartIngredient.objects.filter(user=user or self.cook)
+            .values_list('ingredient__name', 'total_amount')
+        )
+
+    def add(self, recipe):
+        response = self.client.post(f'/api/recipes/{recipe.pk}/shopping_cart/')
+        self.assertEqual(response.status_code, 201)
+
+    def test_add_and_remove(self):
+        self.add(self.porridge)
+        self.add(self.pancakes)
+        self.assertEqual(
+            self.totals(), {'соль': 5, 'сахар': 10, 'масло': 5}
+        )
+
+        response = self.client.delete(
+            f'/api/recipes/{self.porridge.pk}/shopping_cart/'
+        )
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.totals(), {'сахар': 5, 'масло': 5})
+
+    def test_recipe_update_refreshes_carts(self):
+        self.add(self.porridge)
+
+        response = self.client_for(self.author).patch(
+            f'/api/recipes/{self.porridge.pk}/',
+            {'ingredients': [{'id': self.sugar.pk, 'amount': 7},
+                             {'id': self.butter.pk, 'amount': 2}]},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.totals(), {'сахар': 7, 'масло': 2})
+
+    def test_recipe_delete_refreshes_carts(self):
+        self.add(self.porridge)
+        self.add(self.pancakes)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pancakes.delete()
+
+        self.assertEqual(self.totals(), {'соль': 5, 'сахар': 5})
+
+    def test_rebuild_command(self):
+        self.add(self.porridge)
+        ShoppingCartIngredient.objects.filter(user=self.cook).update(
+            total_amount=99
+        )
+        ShoppingCartIngredient.objects.create(
+            user=self.author, ingredient=self.salt, total_amount=1
+        )
+        IngredientRecipe.objects.filter(
+            recipe=self.porridge, ingredient=self.salt
+        ).update(amount=3)
+
+        call_command('rebuild_shopping_lists', stdout=StringIO())
+
+        self.assertEqual(self.totals(), {'соль': 3, 'сахар': 5})
+        self.assertEqual(self.totals(self.author), {})
@@ -0,0 +1,45 @@
+from django.contrib.auth.models import update_last_login
+
+from api.authentication import auth_scope
+from core.versions import get_versions, user_scope
+
+from .base import APIBaseTestCase
+
+
+class UserVersionsTest(APIBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('author')
+        self.scopes = ('recipes', user_scope(self.user.pk),
+                       auth_scope(self.user.pk))
+
+    def save(self, **kwargs):
+        before = get_versions(*self.scopes)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(**kwargs)
+        after = get_versions(*self.scopes)
+        return tuple(new != old for old, new in zip(before, after))
+
+    def test_login_bumps_nothing(self):
+        before = get_versions(*self.scopes)
+        with self.captureOnCommitCallbacks(execute=True):
+            update_last_login(None, self.user)
+        self.assertEqual(get_versions(*self.scopes), before)
+
+    def test_unchanged_save_bumps_nothing(self):
+        self.assertEqual(self.save(), (False, False, False))
+
+    def test_name_change_bumps_recipes_and_user(self):
+        self.user.first_name = 'Renamed'
+        self.assertEqual(self.save(), (True, True, False))
+        self.user.last_name = 'Renamed'
+        self.assertEqual(
+            self.save(update_fields=['last_name']), (True, True, False)
+        )
+
+    def test_password_change_bumps_auth(self):
+        self.user.set_password('N3w-password')
+        self.assertEqual(
+            self.save(update_fields=['password']), (False, False, True)
+        )
@@ -0,0 +1,35 @@
+from .base import APIBaseTestCase
+
+
+class SubscriptionsTests(APIBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.reader = self.create_user('reader')
+        self.author = self.create_user('author')
+        for number in range(4):
+            self.create_recipe(self.author, f'Recipe {number}')
+
+    def test_without_subscriptions(self):
+        response = self.client_for(self.reader).get(
+            '/api/users/subscriptions/'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(response.data['results'], [])
+
+    def test_latest_recipes_are_limited(self):
+        self.reader.subscriptions.add(self.author)
+
+        response = self.client_for(self.reader).get(
+            '/api/users/subscriptions/?recipes_limit=2'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        [author] = response.data['results']
+        self.assertEqual(author['id'], self.author.pk)
+        self.assertEqual(
+            [recipe['name'] for recipe in author['recipes']],
+            ['Recipe 3', 'Recipe 2']
+        )
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
+from .async_views import async_read_patterns
 from .views import (IngredientViewSet, RecipeViewSet,
                     TagViewSet, UserViewSet)
 
@@ -25,6 +27,12 @@ authpatterns = [
     path('auth/', include('djoser.urls.authtoken'))
 ]
 
+router_urls = router.urls
+if settings.ASYNC_READ_VIEWS:
+    router_urls = async_read_patterns(
+        router_urls, (RecipeViewSet, TagViewSet, IngredientViewSet)
+    )
+
 urlpatterns = [
-    path('', include(router.urls)),
+    path('', include(router_urls)),
 ] + authpatterns
@@ -1,6 +1,7 @@
+from django.conf import settings
 from django.contrib.auth.hashers import check_password
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import F
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
@@ -10,11 +11,19 @@ from rest_framework.status import (HTTP_400_BAD_REQUEST, HTTP_204_NO_CONTENT,
                                    HTTP_201_CREATED)
 from rest_framework.viewsets import ModelViewSet
 
+from core.instrumentation import InstrumentedViewMixin
 from recipes.models import (Favorite, Ingredient, IngredientRecipe,
-                            Recipe, ShoppingCart, Tag)
-from users.models import User
-from .filters import RecipeFilter, IngredientFilter
+                            Recipe, ShoppingCart, ShoppingCartIngredient, Tag)
+from recipes import reference
+from recipes.search import ingredient_index
+from recipes.services import adjust_counters, refresh_shopping_lists
+from users.models import User, is_subscribed
+from .cache import (AnonymousResponseCacheMixin, ConditionalGetMixin,
+                    user_scope)
+from .exporters import EXPORTERS
+from .filters import RecipeFilter, StableOrderingFilter
 from .permissions import CustomRecipePermissions
+from .projections import ProjectedReadMixin
 from .serializers import (RecipeSerializer, RecipeCreateSerializer,
                           RecipeSmallSerializer, IngredientSerializer,
                           TagSerializer, UserSerializer,
@@ -22,22 +31,60 @@ from .serializers import (RecipeSerializer, RecipeCreateSerializer,
                           )
 
 
-class UserViewSet(ModelViewSet):
+def get_reference_object(registry, pk):
+    try:
+        obj = registry.get().by_id.get(int(pk))
+    except ValueError:
+        obj = None
+    if obj is None:
+        raise Http404
+    return obj
+
+
+class UserViewSet(InstrumentedViewMixin, ProjectedReadMixin,
+                  ConditionalGetMixin, ModelViewSet):
     queryset = User.objects.all()
+    use_read_replica = True
     serializer_class = UserSerializer
     permission_classes = []
+    query_budgets = {
+        # Token, count estimate, exact count of small tables, page.
+        'list': 4,
+        'retrieve': 2,
+        'me': 2,
+        'subscribe': 8,
+        'subscriptions': 5,
+    }
+    filter_backends = [StableOrderingFilter, ]
+    ordering_fields = ('email', 'recipes_count', 'subscribers_count')
+    cursor_ordering = ('email', 'id')
 
     @action(
         detail=False,
         methods=['get', ],
         permission_classes=[IsAuthenticated]
     )
-    def me(self, *args, **kwargs):
-        current_user = self.request.user
-        data = UserSerializer(
-            current_user,
-            context={'request': self.request}
-        ).data
+    def me(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.get_me, request, etag_scopes=[user_scope(request.user.pk)]
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if self.request.method in SAFE_METHODS and not user.is_anonymous:
+            queryset = queryset.annotate(is_subscribed=is_subscribed(user))
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action in ('subscribe', 'subscriptions'):
+            return SubscriptionSerializer
+        return super().get_serializer_class()
+
+    def get_me(self, *args, **kwargs):
+        # request.user may come from the token cache, counters go stale.
+        current_user = self.get_queryset().get(pk=self.request.user.pk)
+        data = self.get_serializer(current_user).data
         return Response(
             data
         )
@@ -68,7 +115,7 @@ class UserViewSet(ModelViewSet):
             )
 
         current_user.set_password(request.data.get('new_password'))
-        current_user.save()
+        current_user.save(update_fields=['password'])
 
         return Response({'message': 'Password successfully changed.'})
 
@@ -87,10 +134,8 @@ class UserViewSet(ModelViewSet):
             if current_user != obj:
                 if not subscription:
                     obj.subscribers.add(current_user)
-                    data = SubscriptionSerializer(
-                        obj,
-                        context={'request': self.request}
-                    ).data
+                    adjust_counters(User, obj.pk, subscribers_count=1)
+                    data = self.get_serializer(obj).data
                     return Response(
                         data=data,
                         status=HTTP_201_CREATED
@@ -108,6 +153,7 @@ class UserViewSet(ModelViewSet):
         if current_user != obj:
             if subscription:
                 obj.subscribers.remove(current_user)
+                adjust_counters(User, obj.pk, subscribers_count=-1)
                 return Response(
                     data={'message': 'You unsubscribed from the user.'},
                     status=HTTP_204_NO_CONTENT
@@ -128,22 +174,60 @@ class UserViewSet(ModelViewSet):
         permission_classes=[IsAuthenticated]
     )
     def subscriptions(self, *args, **kwargs):
-        user_subscriptions = self.request.user.subscriptions.all()
-        serializer = SubscriptionSerializer(
-            user_subscriptions,
-            many=True,
-            context={'request': self.request}
+        user_subscriptions = self.filter_queryset(
+            self.request.user.subscriptions.order_by('email')
         )
-        queryset = self.paginate_queryset(serializer.data)
-        return self.get_paginated_response(queryset)
+        authors = self.paginate_queryset(user_subscriptions)
+        limit = SubscriptionSerializer.get_recipes_limit(self.request)
+        latest_recipes = {author.pk: [] for author in authors}
+        for recipe in Recipe.objects.latest_by_author(authors, limit):
+            latest_recipes[recipe.author_id].append(recipe)
+        for author in authors:
+            author.latest_recipes = latest_recipes[author.pk]
+        serializer = self.get_serializer(authors, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(InstrumentedViewMixin, ProjectedReadMixin,
+                    ConditionalGetMixin, AnonymousResponseCacheMixin,
+                    ModelViewSet):
     queryset = Recipe.objects.all()
+    use_read_replica = True
     permission_classes = [CustomRecipePermissions]
-    filter_backends = [DjangoFilterBackend, ]
+    filter_backends = [DjangoFilterBackend, StableOrderingFilter]
     filterset_class = RecipeFilter
+    ordering_fields = ('created', 'favorites_count', 'carts_count')
+    cursor_ordering = ('-created', '-id')
     http_method_names = ['get', 'post', 'patch', 'delete', ]
+    cache_scope = 'recipes'
+    etag_scopes = ('recipes', )
+    etag_per_user = True
+    # Popularity counters change without bumping 'recipes'.
+    etag_max_age = settings.COUNTERS_MAX_AGE
+    cache_query_params = ('tags', 'author', 'page', 'limit', 'ordering',
+                          'cursor')
+    counter_fields = {
+        Favorite: 'favorites_count',
+        ShoppingCart: 'carts_count',
+    }
+    query_budgets = {
+        'list': 7,
+        'retrieve': 6,
+        'create': 20,
+        'partial_update': 24,
+        'destroy': 24,
+        'favorite': 8,
+        'shopping_cart': 12,
+        'download_shopping_cart': 3,
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method in SAFE_METHODS:
+            queryset = queryset.with_related().with_user_flags(
+                self.request.user
+            )
+        return queryset
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
@@ -162,24 +246,25 @@ class RecipeViewSet(ModelViewSet):
     @action(
         detail=False,
         methods=['get', ],
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        renderer_classes=EXPORTERS
     )
     def download_shopping_cart(self, request):
-        ingredients = IngredientRecipe.objects.filter(
-            recipe__shopping_cart__user=request.user).values(
-            'ingredient__measure', 'ingredient__name').annotate(
-            amount=Sum('amount')
+        ingredients = ShoppingCartIngredient.objects.filter(
+            user=request.user).values(
+            name=F('ingredient__name'),
+            measure=F('ingredient__measure'),
+            amount=F('total_amount')
+        ).order_by('name')
+        exporter = request.accepted_renderer
+        return exporter.response(ingredients.iterator())
+
+    def refresh_shopping_list(self, user, pk):
+        refresh_shopping_lists(
+            [user.pk],
+            IngredientRecipe.objects.filter(recipe_id=pk).values(
+                'ingredient_id')
         )
-        result = 'Cписок покупок:\n\nНазвание продукта - Кол-во/Ед.изм.\n'
-        for ingredient in ingredients:
-            result += ''.join([
-                f'{ingredient["ingredient__name"]} - {ingredient["amount"]}/'
-                f'{ingredient["ingredient__measure"]} \n'
-            ])
-        response = HttpResponse(result, content_type='text/plain')
-        response['Content-Disposition'] = ('attachment;'
-                                           'filename="shopping_list.txt"')
-        return response
 
     def add_to(self, model, user, pk):
         if model.objects.filter(user=user, recipe__id=pk).exists():
@@ -187,13 +272,21 @@ class RecipeViewSet(ModelViewSet):
                             status=HTTP_400_BAD_REQUEST)
         recipe = get_object_or_404(Recipe, id=pk)
         model.objects.create(user=user, recipe=recipe)
+        adjust_counters(Recipe, recipe.pk, **{self.counter_fields[model]: 1})
+        if model is ShoppingCart:
+            self.refresh_shopping_list(user, pk)
         serializer = RecipeSmallSerializer(recipe)
         return Response(serializer.data, status=HTTP_201_CREATED)
 
     def delete_from(self, model, user, pk):
         obj = model.objects.filter(user=user, recipe__id=pk)
         if obj.exists():
-            obj.delete()
+            deleted, _ = obj.delete()
+            adjust_counters(
+                Recipe, pk, **{self.counter_fields[model]: -deleted}
+            )
+            if model is ShoppingCart:
+                self.refresh_shopping_list(user, pk)
             return Response(status=HTTP_204_NO_CONTENT)
         return Response({'errors': 'Recipe has already been deleted!'},
                         status=HTTP_400_BAD_REQUEST)
@@ -219,17 +312,57 @@ class RecipeViewSet(ModelViewSet):
         return self.delete_from(ShoppingCart, request.user, pk)
 
 
-class IngredientViewSet(ModelViewSet):
+class IngredientViewSet(InstrumentedViewMixin, ProjectedReadMixin,
+                        ConditionalGetMixin, ModelViewSet):
     queryset = Ingredient.objects.all()
+    use_read_replica = True
     serializer_class = IngredientSerializer
-    filter_backends = [DjangoFilterBackend, ]
-    filterset_class = IngredientFilter
     http_method_names = ['get', ]
     pagination_class = None
+    etag_scopes = ('ingredients', )
+    query_budgets = {
+        'list': 2,
+        'retrieve': 2,
+    }
+
+    def get_queryset(self):
+        return reference.ingredients.get().items
 
+    def get_object(self):
+        return get_reference_object(reference.ingredients, self.kwargs['pk'])
 
-class TagViewSet(ModelViewSet):
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if not name:
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(self.search, request, name)
+
+    def search(self, request, name):
+        try:
+            limit = int(request.query_params.get('limit'))
+        except (TypeError, ValueError):
+            limit = None
+        if limit is not None and limit <= 0:
+            # Negative limits would slice matches off the end.
+            limit = None
+        return Response(ingredient_index.search(name, limit))
+
+
+class TagViewSet(InstrumentedViewMixin, ProjectedReadMixin,
+                 ConditionalGetMixin, ModelViewSet):
     queryset = Tag.objects.all()
+    use_read_replica = True
     serializer_class = TagSerializer
     http_method_names = ['get', ]
     pagination_class = None
+    etag_scopes = ('tags', )
+    query_budgets = {
+        'list': 2,
+        'retrieve': 2,
+    }
+
+    def get_queryset(self):
+        return reference.tags.get().items
+
+    def get_object(self):
+        return get_reference_object(reference.tags, self.kwargs['pk'])
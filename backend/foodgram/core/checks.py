@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries the other workers never see.
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.TESTING or backend not in PER_PROCESS_CACHES:
+        return []
+    return [Error(
+        f'{backend} is not shared between workers.',
+        hint='Cache versions bumped by one worker or by management '
+             'commands must reach all of them, set CACHE_BACKEND to a '
+             'shared cache such as memcached.',
+        id='core.E001',
+    )]
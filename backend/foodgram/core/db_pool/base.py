@@ -0,0 +1,104 @@
+import os
+import threading
+from functools import partial
+
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base, creation
+
+from core.metrics import metrics
+
+from .pool import ConnectionPool, PoolTimeoutError
+
+POOL_DEFAULTS = {
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10,
+    'MAX_LIFETIME': 1800,
+    'MAX_IDLE': 300,
+    'HEALTH_CHECK_AFTER': 5,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Sockets inherited from the master process must not be shared.
+os.register_at_fork(after_in_child=_pools.clear)
+
+
+def get_pool(alias, conn_params, options):
+    """Pool of `alias`, one per process and set of connection parameters."""
+    key = (alias, tuple(sorted(
+        (name, str(value)) for name, value in conn_params.items()
+    )))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = {**POOL_DEFAULTS, **options}
+            pool = _pools[key] = ConnectionPool(
+                max_size=options['MAX_SIZE'],
+                timeout=options['TIMEOUT'],
+                max_lifetime=options['MAX_LIFETIME'],
+                max_idle=options['MAX_IDLE'],
+                check_after=options['HEALTH_CHECK_AFTER'],
+            )
+            metrics.register_collector(f'db_pool_{alias}', pool.metrics)
+    return pool
+
+
+def close_pools(database):
+    """Close the idle connections of every pool connected to `database`."""
+    with _pools_lock:
+        pools = [
+            pool for (alias, params), pool in _pools.items()
+            if dict(params).get('database') == database
+        ]
+    for pool in pools:
+        pool.close_idle()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Pooled connections to the test database would block DROP DATABASE.
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend that keeps connections open in a process pool.
+
+    Django still closes connections at the end of every request, which
+    returns them to the pool instead of disconnecting. Pooling is enabled
+    and configured by the `POOL` key of the database settings, without it
+    the backend behaves like the plain PostgreSQL one.
+    """
+    creation_class = DatabaseCreation
+    _pool = None
+
+    def get_new_connection(self, conn_params):
+        if self.alias == NO_DB_ALIAS or 'POOL' not in self.settings_dict:
+            return super().get_new_connection(conn_params)
+        self._pool = get_pool(
+            self.alias, conn_params, self.settings_dict['POOL']
+        )
+        try:
+            connection = self._pool.acquire(
+                partial(super().get_new_connection, conn_params)
+            )
+        except PoolTimeoutError as error:
+            raise base.Database.OperationalError(str(error)) from error
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if self._pool is None:
+            super()._close()
+            return
+        with self.wrap_database_errors:
+            # A connection closed inside atomic() stays referenced by the
+            # wrapper until the block exits, so it can't be handed out.
+            self._pool.release(
+                self.connection, reusable=not self.in_atomic_block
+            )
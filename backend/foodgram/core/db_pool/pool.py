@@ -0,0 +1,204 @@
+import logging
+import threading
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class PooledConnection:
+    __slots__ = ('connection', 'created_at', 'released_at')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = self.released_at = monotonic()
+
+
+class ConnectionPool:
+    """Bounded pool of DB-API connections shared by the threads of a worker.
+
+    At most `max_size` connections are open, idle or in use; checkouts
+    beyond that wait up to `timeout` seconds. Idle connections are pinged
+    on checkout once they have been idle for `check_after` seconds,
+    closed after `max_idle` seconds and never reused past `max_lifetime`.
+    """
+
+    def __init__(self, max_size=10, timeout=10, max_lifetime=1800,
+                 max_idle=300, check_after=5):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self._condition = threading.Condition()
+        # Sorted by release time, the most recently used come last.
+        self._idle = []
+        self._in_use = {}
+        self._size = 0
+        self._waiters = 0
+        self.checkouts = self.created = self.discarded = self.timeouts = 0
+        self.checkout_seconds = self.checkout_seconds_max = 0.0
+
+    def acquire(self, connect):
+        """Check out a connection, opening one with `connect` if needed."""
+        started = monotonic()
+        while True:
+            entry, stale = self._checkout(started + self.timeout)
+            self._close_all(stale)
+            if entry is None:
+                try:
+                    entry = PooledConnection(connect())
+                except BaseException:
+                    self._forget()
+                    raise
+                with self._condition:
+                    self.created += 1
+                break
+            if self._usable(entry):
+                break
+            self._discard(entry)
+        seconds = monotonic() - started
+        with self._condition:
+            self._in_use[id(entry.connection)] = entry
+            self.checkouts += 1
+            self.checkout_seconds += seconds
+            self.checkout_seconds_max = max(
+                self.checkout_seconds_max, seconds
+            )
+        return entry.connection
+
+    def release(self, connection, reusable=True):
+        """Return a checked out connection, closing it unless `reusable`."""
+        with self._condition:
+            entry = self._in_use.pop(id(connection), None)
+        if entry is None:
+            self._close(connection)
+            return
+        now = monotonic()
+        if (not reusable or connection.closed
+                or now - entry.created_at >= self.max_lifetime
+                or not self._reset(connection)):
+            self._discard(entry)
+            return
+        entry.released_at = now
+        with self._condition:
+            self._idle.append(entry)
+            stale = self._reap(now)
+            self._condition.notify(1 + len(stale))
+        self._close_all(stale)
+
+    def close_idle(self):
+        with self._condition:
+            stale, self._idle = self._idle, []
+            self._size -= len(stale)
+            self._condition.notify_all()
+        self._close_all(stale)
+
+    def metrics(self):
+        with self._condition:
+            return {
+                'size': self._size,
+                'max_size': self.max_size,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'waiters': self._waiters,
+                'checkouts_total': self.checkouts,
+                'created_total': self.created,
+                'discarded_total': self.discarded,
+                'timeouts_total': self.timeouts,
+                'checkout_seconds_total': round(self.checkout_seconds, 6),
+                'checkout_seconds_max': round(self.checkout_seconds_max, 6),
+            }
+
+    def _checkout(self, deadline):
+        """Take an idle entry or a free slot, `None` for the latter.
+
+        Also returns the entries reaped meanwhile, to be closed outside
+        of the lock.
+        """
+        stale = []
+        with self._condition:
+            while True:
+                now = monotonic()
+                stale.extend(self._reap(now))
+                while self._idle:
+                    entry = self._idle.pop()
+                    if now - entry.created_at < self.max_lifetime:
+                        return entry, stale
+                    stale.append(entry)
+                    self._size -= 1
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, stale
+                remaining = deadline - now
+                if remaining <= 0:
+                    self.timeouts += 1
+                    self._close_all(stale)
+                    raise PoolTimeoutError(
+                        f'No database connection was released within '
+                        f'{self.timeout}s, all {self.max_size} are in use.'
+                    )
+                self._waiters += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiters -= 1
+
+    def _reap(self, now):
+        """Remove idle entries unused for `max_idle`, under the lock."""
+        count = 0
+        for entry in self._idle:
+            if now - entry.released_at < self.max_idle:
+                break
+            count += 1
+        stale, self._idle = self._idle[:count], self._idle[count:]
+        self._size -= count
+        return stale
+
+    def _usable(self, entry):
+        connection = entry.connection
+        if connection.closed:
+            return False
+        if monotonic() - entry.released_at < self.check_after:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+        except Exception:
+            logger.info('Discarding a broken pooled connection.')
+            return False
+        return True
+
+    def _reset(self, connection):
+        # Leftover transactions would leak into the next checkout.
+        try:
+            connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    def _forget(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _discard(self, entry):
+        self._close(entry.connection)
+        with self._condition:
+            self.discarded += 1
+        self._forget()
+
+    def _close_all(self, entries):
+        for entry in entries:
+            self._close(entry.connection)
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
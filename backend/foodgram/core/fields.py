@@ -1,16 +1,147 @@
 import base64
+import binascii
+import re
+from tempfile import SpooledTemporaryFile
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from PIL import Image, UnidentifiedImageError
 from rest_framework import serializers
 
+BASE64_MARKER = ';base64,'
+DECODE_CHUNK_SIZE = 64 * 1024
+PROBE_SIZE = 64 * 1024
+WHITESPACE_CHARS = ' \t\n\r\f\v'
+WHITESPACE = re.compile(f'[{WHITESPACE_CHARS}]+')
+
 
 class Base64ImageField(serializers.ImageField):
-    """Custom ImageField that encode/decode image data to a string."""
+    """Custom ImageField that encode/decode image data to a string.
+
+    The payload is decoded chunk by chunk, straight from slices of the
+    data URI, into a spooled temporary file. Its byte size is checked
+    before decoding, and its dimensions once the image header has been
+    decoded.
+    """
+    default_error_messages = {
+        'invalid_base64': 'Image must be a base64 encoded data URI.',
+        'too_large': 'Image must not be larger than {max_size} bytes.',
+        'too_many_pixels': 'Image must not have more than {max_pixels} '
+                           'pixels.',
+    }
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format_type, image_string = data.split(';base64,')
-            ext = format_type.split('/')[-1]
-            data = ContentFile(
-                base64.b64decode(image_string), name='temp.' + ext
-            )
+            data = self.decode(data)
         return super().to_internal_value(data)
+
+    def decode(self, data):
+        marker = data.find(BASE64_MARKER)
+        if marker == -1:
+            self.fail('invalid_base64')
+        ext = data[:marker].split('/')[-1]
+        start = marker + len(BASE64_MARKER)
+        length = len(data) - start - sum(
+            data.count(char, start) for char in WHITESPACE_CHARS
+        )
+        max_size = settings.BASE64_IMAGE_MAX_BYTES
+        if length // 4 * 3 - 2 > max_size:
+            self.fail('too_large', max_size=max_size)
+
+        file = SpooledTemporaryFile(
+            max_size=settings.BASE64_IMAGE_SPOOL_SIZE
+        )
+        probed = False
+        # MIME-style payloads are wrapped, so a chunk may end mid quantum
+        # once whitespace is dropped. The remainder carries over.
+        carry = ''
+        for offset in range(start, len(data), DECODE_CHUNK_SIZE):
+            chunk = carry + WHITESPACE.sub(
+                '', data[offset:offset + DECODE_CHUNK_SIZE]
+            )
+            aligned = len(chunk) - len(chunk) % 4
+            chunk, carry = chunk[:aligned], chunk[aligned:]
+            try:
+                file.write(base64.b64decode(chunk, validate=True))
+            except binascii.Error:
+                file.close()
+                self.fail('invalid_base64')
+            if not probed and file.tell() >= PROBE_SIZE:
+                probed = self.check_dimensions(file, complete=False)
+        if carry:
+            file.close()
+            self.fail('invalid_base64')
+        if not probed:
+            self.check_dimensions(file, complete=True)
+
+        size = file.tell()
+        file.seek(0)
+        image = File(file, name='temp.' + ext)
+        image.size = size
+        return image
+
+    def check_dimensions(self, file, complete):
+        """Reject images over the pixel limit using only their header.
+
+        Returns False when a partially decoded file doesn't contain the
+        whole header yet.
+        """
+        position = file.tell()
+        file.seek(0)
+        max_pixels = settings.BASE64_IMAGE_MAX_PIXELS
+        try:
+            with Image.open(file) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            file.close()
+            self.fail('too_many_pixels', max_pixels=max_pixels)
+        except (UnidentifiedImageError, OSError):
+            # Incomplete headers are probed again once fully decoded,
+            # broken images are reported by ImageField validation.
+            file.seek(position)
+            return complete
+        if width * height > max_pixels:
+            file.close()
+            self.fail('too_many_pixels', max_pixels=max_pixels)
+        file.seek(position)
+        return True
+
+
+def render_srcset(variants, request=None):
+    """Render recorded image variants as `srcset` strings by format."""
+    srcset = {}
+    for variant in variants or []:
+        url = default_storage.url(variant['name'])
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        srcset.setdefault(variant['format'], []).append(
+            f'{url} {variant["width"]}w'
+        )
+    return {fmt: ', '.join(urls) for fmt, urls in srcset.items()}
+
+
+class ImageSrcsetField(serializers.ReadOnlyField):
+    """Image variants as `srcset` strings, see `render_srcset`."""
+    def to_representation(self, value):
+        return render_srcset(value, self.context.get('request'))
+
+
+class ReferencePrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolve primary keys against a `core.reference` snapshot."""
+    def __init__(self, registry, **kwargs):
+        self.registry = registry
+        kwargs.setdefault('queryset', registry.model.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = self.registry.get().by_id.get(pk)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
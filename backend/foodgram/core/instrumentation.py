@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_current_stats = ContextVar('request_stats', default=None)
+
+
+class QueryBudgetExceededError(Exception):
+    pass
+
+
+class RequestStats:
+    """SQL and serializer totals of the request being handled."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.view = None
+        self.action = None
+        self.query_budget = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += perf_counter() - started
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # Connections are per thread, async read views query from a thread
+    # pool, so every connection records into the current request stats.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def add_serializer_time(seconds):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.serializer_seconds += seconds
+
+
+class TimedSerializer:
+    """Proxy that adds the time spent in `.data` to the request stats."""
+
+    def __init__(self, serializer):
+        self._serializer = serializer
+
+    def __getattr__(self, name):
+        return getattr(self._serializer, name)
+
+    @property
+    def data(self):
+        started = perf_counter()
+        try:
+            return self._serializer.data
+        finally:
+            add_serializer_time(perf_counter() - started)
+
+
+class InstrumentedViewMixin:
+    """Time serializers and declare per-action `query_budgets`."""
+    query_budgets = {}
+
+    def get_serializer(self, *args, **kwargs):
+        return TimedSerializer(super().get_serializer(*args, **kwargs))
+
+
+class InstrumentationMiddleware:
+    """Record queries, DB time and serializer time per view and action.
+
+    Totals are sent back in `Server-Timing` and exported by the metrics
+    view. Requests over the query budget of their action are logged, or
+    raise `QueryBudgetExceededError` with `QUERY_BUDGET_STRICT` so that
+    N+1 regressions fail the tests.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function like MiddlewareMixin.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        for connection in connections.all():
+            install_query_recorder(None, connection)
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.finish(response, stats, perf_counter() - started)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        started = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.finish(response, stats, perf_counter() - started)
+
+    def finish(self, response, stats, seconds):
+        if stats.view is None:
+            return response
+
+        response['Server-Timing'] = (
+            f'db;dur={stats.db_seconds * 1000:.1f};'
+            f'desc="{stats.queries} queries", '
+            f'serializer;dur={stats.serializer_seconds * 1000:.1f}, '
+            f'total;dur={seconds * 1000:.1f}'
+        )
+        size = 0 if response.streaming else len(response.content)
+        over_budget = (
+            stats.query_budget is not None
+            and stats.queries > stats.query_budget
+        )
+        metrics.observe(
+            stats.view, stats.action, stats, seconds, size, over_budget
+        )
+        if over_budget:
+            message = (
+                f'{stats.view}.{stats.action} ran {stats.queries} queries, '
+                f'the budget is {stats.query_budget}.'
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceededError(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = _current_stats.get()
+        if stats is None:
+            return
+        view_class = getattr(view_func, 'cls', None)
+        if view_class is None:
+            stats.view = getattr(view_func, '__name__', 'unknown')
+            stats.action = request.method.lower()
+            return
+        actions = getattr(view_func, 'actions', None) or {}
+        stats.view = view_class.__name__
+        stats.action = actions.get(
+            request.method.lower(), request.method.lower()
+        )
+        budgets = getattr(view_class, 'query_budgets', {})
+        stats.query_budget = budgets.get(stats.action)
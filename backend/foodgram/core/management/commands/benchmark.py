@@ -0,0 +1,207 @@
+import json
+import math
+import os
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Recipe
+from users.models import User
+
+DEFAULT_BASELINE = settings.BASE_DIR / 'benchmarks' / 'baseline.json'
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of sorted `samples`."""
+    rank = max(math.ceil(percent / 100 * len(samples)), 1)
+    return samples[rank - 1]
+
+
+def isolated_cache(namespace):
+    """Settings giving the benchmark a cache namespace of its own.
+
+    Cold requests get a new namespace instead of clearing the cache, which
+    is shared with the application. Entries left behind expire or get
+    evicted.
+    """
+    default = settings.CACHES['default']
+    prefix = ':'.join(filter(None, (
+        default.get('KEY_PREFIX'), f'benchmark-{os.getpid()}-{namespace}'
+    )))
+    return override_settings(
+        CACHES={**settings.CACHES, 'default': {**default,
+                                               'KEY_PREFIX': prefix}}
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the main API endpoints through the test client and '
+        'compare the results with a JSON baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Start every request with an empty cache namespace.'
+        )
+        parser.add_argument(
+            '--prefix', default='bench',
+            help='Prefix of the generate_dataset users to benchmark as.'
+        )
+        parser.add_argument(
+            '--baseline', default=str(DEFAULT_BASELINE),
+            help='JSON file with the results to compare against.'
+        )
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Store this run as the new baseline.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Allowed p95 slowdown relative to the baseline.'
+        )
+
+    def get_subjects(self, prefix):
+        """The busiest user and the most favorited recipe of the dataset."""
+        user = (
+            User.objects.filter(username__startswith=f'{prefix}_')
+            .annotate(
+                subscribed=Count('subscriptions', distinct=True),
+                favorited=Count('favorites', distinct=True),
+                carted=Count('shopping_cart', distinct=True),
+            ).filter(subscribed__gt=0, favorited__gt=0, carted__gt=0)
+            .order_by('-subscribed', 'id').first()
+        )
+        recipe = (
+            Recipe.objects.filter(author__username__startswith=f'{prefix}_')
+            .order_by('-favorites_count', 'id').first()
+        )
+        if user is None or recipe is None:
+            raise CommandError(
+                f'No dataset prefixed with "{prefix}_", run '
+                f'generate_dataset --prefix {prefix} first.'
+            )
+        return user, recipe
+
+    def get_scenarios(self, token, recipe):
+        auth = {'HTTP_AUTHORIZATION': f'Token {token.key}'}
+        return {
+            'recipe_list_anonymous': ('/api/recipes/', {}),
+            'recipe_list': ('/api/recipes/', auth),
+            'recipe_list_filtered': (
+                '/api/recipes/?is_favorited=1&tags=lunch&tags=dinner', auth
+            ),
+            'recipe_detail': (f'/api/recipes/{recipe.pk}/', auth),
+            'subscriptions': (
+                '/api/users/subscriptions/?recipes_limit=3', auth
+            ),
+            'shopping_cart_download': (
+                '/api/recipes/download_shopping_cart/', auth
+            ),
+            'ingredient_search': ('/api/ingredients/?name=сах', {}),
+        }
+
+    def run_scenarios(self, scenarios, options):
+        client = Client()
+        results = {}
+        self.stdout.write(
+            f'{"scenario":<26}{"p50":>9}{"p95":>9}{"p99":>9}{"queries":>9}'
+        )
+        for name, (path, headers) in scenarios.items():
+            result = self.run_scenario(
+                client, path, headers, options['iterations'],
+                options['warmup'], options['cold']
+            )
+            results[name] = result
+            self.stdout.write(
+                f'{name:<26}{result["p50_ms"]:>9}{result["p95_ms"]:>9}'
+                f'{result["p99_ms"]:>9}{result["queries"]:>9}'
+            )
+        return results
+
+    def run_scenario(self, client, path, headers, iterations, warmup,
+                     cold):
+        timings = []
+        queries = []
+        for iteration in range(warmup + iterations):
+            namespace = (
+                isolated_cache(f'cold-{iteration}') if cold else nullcontext()
+            )
+            with namespace, CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(path, **headers)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise CommandError(f'{path}: HTTP {response.status_code}')
+            if iteration >= warmup:
+                timings.append(elapsed * 1000)
+                queries.append(len(captured))
+        timings.sort()
+        return {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'mean_ms': round(sum(timings) / len(timings), 2),
+            'queries': max(queries),
+        }
+
+    def handle(self, *args, **kwargs):
+        baseline_path = Path(kwargs['baseline'])
+        if not kwargs['save_baseline'] and not baseline_path.exists():
+            raise CommandError(
+                f'No baseline at {baseline_path}, run with --save-baseline '
+                f'on a known good revision first.'
+            )
+        user, recipe = self.get_subjects(kwargs['prefix'])
+        token, created = Token.objects.get_or_create(user=user)
+        try:
+            with isolated_cache('warm'):
+                results = self.run_scenarios(
+                    self.get_scenarios(token, recipe), kwargs
+                )
+        finally:
+            if created:
+                token.delete()
+
+        if kwargs['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2))
+            self.stdout.write(self.style.SUCCESS(
+                f'Baseline saved to {baseline_path}.'
+            ))
+            return
+        baseline = json.loads(baseline_path.read_text())
+        regressions = []
+        for name, result in results.items():
+            expected = baseline.get(name)
+            if expected is None:
+                continue
+            limit = expected['p95_ms'] * (1 + kwargs['tolerance'])
+            if result['p95_ms'] > limit:
+                regressions.append(
+                    f'{name}: p95 {result["p95_ms"]}ms, '
+                    f'baseline {expected["p95_ms"]}ms'
+                )
+            if result['queries'] > expected['queries']:
+                regressions.append(
+                    f'{name}: {result["queries"]} queries, '
+                    f'baseline {expected["queries"]}'
+                )
+        if regressions:
+            raise CommandError(
+                'Regressions against the baseline:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('No regressions.'))
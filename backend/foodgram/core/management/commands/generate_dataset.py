@@ -0,0 +1,181 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.versions import bump_version
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag, TagRecipe)
+from recipes.services import reconcile_counters
+from users.models import User
+
+DEFAULT_IMAGE = 'recipes/images/abc8b03799fa7f33d224cda619f19c51.jpeg'
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+    ('Десерт', '#F7C04A', 'dessert'),
+    ('Выпечка', '#B5651D', 'bakery'),
+)
+
+
+def zipf_weights(size, exponent):
+    return [1 / rank ** exponent for rank in range(1, size + 1)]
+
+
+def sample(rng, population, weights, size):
+    """Up to `size` distinct items drawn with the given weights."""
+    size = min(size, len(population))
+    chosen = {}
+    while len(chosen) < size:
+        for item in rng.choices(population, weights, k=size - len(chosen)):
+            chosen[item.pk] = item
+    return list(chosen.values())
+
+
+class Command(BaseCommand):
+    help = 'Generate a reproducible synthetic dataset for load tests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument(
+            '--recipes', type=int, default=5,
+            help='Mean number of recipes per user, power-law distributed.'
+        )
+        parser.add_argument('--subscriptions', type=int, default=10)
+        parser.add_argument('--favorites', type=int, default=20)
+        parser.add_argument('--carts', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--prefix', default='bench',
+            help='Prefix of generated emails, usernames and recipe names.'
+        )
+        parser.add_argument('--image', default=DEFAULT_IMAGE)
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **kwargs):
+        prefix = kwargs['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(
+                f'Users prefixed with "{prefix}_" exist, pick another prefix.'
+            )
+        rng = random.Random(kwargs['seed'])
+        self.batch_size = kwargs['batch_size']
+        started = time.perf_counter()
+
+        call_command('loadfixtures', verbosity=0)
+        ingredients = list(Ingredient.objects.order_by('id'))
+        if not ingredients:
+            raise CommandError('No ingredients to build recipes from.')
+        rng.shuffle(ingredients)
+        for name, color, slug in DEFAULT_TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color}
+            )
+        tags = list(Tag.objects.order_by('id'))
+
+        with transaction.atomic():
+            users = self.create_users(prefix, kwargs['users'])
+            recipes = self.create_recipes(
+                rng, prefix, users, kwargs['recipes'], kwargs['image']
+            )
+            self.create_contents(rng, recipes, ingredients, tags)
+            self.create_subscriptions(rng, users, kwargs['subscriptions'])
+            self.create_marks(rng, users, recipes, Favorite,
+                              kwargs['favorites'])
+            self.create_marks(rng, users, recipes, ShoppingCart,
+                              kwargs['carts'])
+            # Bulk inserts send no signals, derive the denormalized data.
+            reconcile_counters()
+        call_command('rebuild_shopping_lists', verbosity=0)
+        bump_version('recipes', 'tags', 'ingredients')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(users)} users and {len(recipes)} recipes generated in '
+            f'{time.perf_counter() - started:.1f}s.'
+        ))
+
+    def bulk_create(self, model, objects):
+        return model.objects.bulk_create(
+            objects, batch_size=self.batch_size, ignore_conflicts=True
+        )
+
+    def create_users(self, prefix, count):
+        password = make_password(f'{prefix}-password')
+        self.bulk_create(User, (
+            User(email=f'{prefix}_{number}@example.com',
+                 username=f'{prefix}_{number}',
+                 first_name='Bench', last_name=str(number),
+                 password=password)
+            for number in range(count)
+        ))
+        return list(
+            User.objects.filter(username__startswith=f'{prefix}_')
+            .order_by('id')
+        )
+
+    def create_recipes(self, rng, prefix, users, mean, image):
+        objects = []
+        for user in users:
+            count = min(int(rng.paretovariate(1.5) * mean / 3), mean * 20)
+            objects.extend(
+                Recipe(author=user, name=f'{prefix} {user.pk}-{number}',
+                       image=image, text='Generated recipe.',
+                       cooking_time=rng.randint(5, 180))
+                for number in range(count)
+            )
+        self.bulk_create(Recipe, objects)
+        return list(
+            Recipe.objects.filter(author__in=users).order_by('id')
+            .only('id', 'author_id')
+        )
+
+    def create_contents(self, rng, recipes, ingredients, tags):
+        ingredient_weights = zipf_weights(len(ingredients), 1.1)
+        tag_weights = zipf_weights(len(tags), 0.8)
+        rows, tag_rows = [], []
+        for recipe in recipes:
+            for ingredient in sample(rng, ingredients, ingredient_weights,
+                                     rng.randint(3, 12)):
+                rows.append(IngredientRecipe(
+                    recipe_id=recipe.pk, ingredient_id=ingredient.pk,
+                    amount=rng.randint(1, 500)
+                ))
+            for tag in sample(rng, tags, tag_weights, rng.randint(1, 3)):
+                tag_rows.append(TagRecipe(recipe_id=recipe.pk, tag=tag))
+        self.bulk_create(IngredientRecipe, rows)
+        self.bulk_create(TagRecipe, tag_rows)
+
+    def create_subscriptions(self, rng, users, mean):
+        """Preferential attachment, a few authors get most subscribers."""
+        through = User.subscriptions.through
+        authors = users[:]
+        rng.shuffle(authors)
+        weights = zipf_weights(len(authors), 1.2)
+        rows = []
+        for user in users:
+            count = int(rng.expovariate(1 / mean)) if mean else 0
+            for author in sample(rng, authors, weights, count):
+                if author.pk != user.pk:
+                    rows.append(
+                        through(from_user_id=user.pk, to_user_id=author.pk)
+                    )
+        self.bulk_create(through, rows)
+
+    def create_marks(self, rng, users, recipes, model, mean):
+        if not recipes:
+            return
+        recipes = recipes[:]
+        rng.shuffle(recipes)
+        weights = zipf_weights(len(recipes), 1.0)
+        rows = []
+        for user in users:
+            count = int(rng.expovariate(1 / mean)) if mean else 0
+            rows.extend(
+                model(user_id=user.pk, recipe_id=recipe.pk)
+                for recipe in sample(rng, recipes, weights, count)
+            )
+        self.bulk_create(model, rows)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import generate_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails and WebP variants of recipe images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Regenerate variants of recipes that already have them.'
+        )
+
+    def handle(self, *args, **kwargs):
+        recipes = Recipe.objects.all()
+        if not kwargs['all']:
+            recipes = recipes.filter(image_variants=[])
+        done = failed = 0
+        for recipe_id, image_name in recipes.values_list('id', 'image'):
+            try:
+                generate_variants(recipe_id, image_name)
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f'{image_name}: {error}')
+                continue
+            done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Variants generated for {done} recipes, {failed} failed.'
+        ))
@@ -1,24 +1,124 @@
 import csv
+import json
+import time
+from pathlib import Path
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
+from core.versions import bump_version
 from recipes.models import Ingredient
 
 CSV_ROOT = settings.BASE_DIR / 'data'
+READ_SIZE = 64 * 1024
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8', newline='') as csvfile:
+        for row in csv.reader(csvfile):
+            if row:
+                yield row[0], row[1]
+
+
+def iter_json_array(file):
+    """Yield the items of a top-level JSON array without loading it whole."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    eof = False
+    while True:
+        buffer = buffer.lstrip(' \t\r\n,')
+        if not started and buffer:
+            if buffer[0] != '[':
+                raise CommandError('JSON fixture must be an array.')
+            started = True
+            buffer = buffer[1:]
+            continue
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise CommandError('JSON fixture is truncated.')
+            chunk = file.read(READ_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as jsonfile:
+        for item in iter_json_array(jsonfile):
+            yield item['name'], item['measurement_unit']
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
 
 
 class Command(BaseCommand):
+    help = 'Load ingredients from a CSV or JSON fixture.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default=str(CSV_ROOT / 'ingredients.csv'),
+            help='CSV (name,measure) or JSON fixture with ingredients.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of ingredients written per transaction.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Print the ingredients that would be added and exit.'
+        )
+
     def handle(self, *args, **kwargs):
-        with open(
-                str(CSV_ROOT) + '/ingredients.csv', encoding='utf-8'
-        ) as csvfile:
-            user = csv.reader(csvfile)
-            for row in user:
-                Ingredient.objects.get_or_create(
-                    name=row[0],
-                    measure=row[1]
-                )
-                self.stdout.write(
-                    self.style.SUCCESS('Ingridient fixture loaded!')
-                )
+        path = Path(kwargs['path'])
+        reader = READERS.get(path.suffix.lower())
+        if reader is None:
+            raise CommandError(f'Unsupported fixture format: {path.suffix}')
+        batch_size = kwargs['batch_size']
+        dry_run = kwargs['dry_run']
+
+        started = time.perf_counter()
+        seen = set(Ingredient.objects.values_list('name', 'measure'))
+        total = added = 0
+        batch = []
+        for name, measure in reader(path):
+            total += 1
+            key = (name.strip(), measure.strip())
+            if key in seen:
+                continue
+            seen.add(key)
+            added += 1
+            if dry_run:
+                self.stdout.write(f'+ {key[0]} ({key[1]})')
+                continue
+            batch.append(Ingredient(name=key[0], measure=key[1]))
+            if len(batch) >= batch_size:
+                self.save(batch)
+                batch = []
+        if batch:
+            self.save(batch)
+        if added and not dry_run:
+            # bulk_create sends no signals, refresh reference snapshots.
+            bump_version('ingredients')
+
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else total
+        action = 'would be added' if dry_run else 'added'
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} rows read, {added} ingredients {action}, '
+            f'{total - added} skipped in {elapsed:.2f}s ({rate:.0f} rows/s).'
+        ))
+
+    @transaction.atomic
+    def save(self, batch):
+        Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import ShoppingCart, ShoppingCartIngredient
+from recipes.services import refresh_shopping_lists
+
+
+class Command(BaseCommand):
+    help = 'Rebuild aggregated shopping lists from shopping carts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of users rebuilt per transaction.'
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        user_ids = list(
+            ShoppingCart.objects.order_by('user_id')
+            .values_list('user_id', flat=True).distinct()
+        )
+        ShoppingCartIngredient.objects.exclude(user_id__in=user_ids).delete()
+        for start in range(0, len(user_ids), batch_size):
+            refresh_shopping_lists(user_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(
+            f'Shopping lists rebuilt for {len(user_ids)} users.'
+        ))
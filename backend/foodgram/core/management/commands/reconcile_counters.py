@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from recipes.services import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recount favorite, cart, recipe and subscriber counters.'
+
+    def handle(self, *args, **kwargs):
+        for counter, fixed in reconcile_counters().items():
+            self.stdout.write(f'{counter}: {fixed} rows fixed')
+        self.stdout.write(self.style.SUCCESS('Counters reconciled.'))
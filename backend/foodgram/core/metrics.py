@@ -0,0 +1,92 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+class EndpointStats:
+    __slots__ = ('requests', 'queries', 'db_seconds', 'serializer_seconds',
+                 'response_bytes', 'seconds', 'over_budget', 'buckets')
+
+    def __init__(self):
+        self.requests = self.queries = self.response_bytes = 0
+        self.db_seconds = self.serializer_seconds = self.seconds = 0.0
+        self.over_budget = 0
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+
+
+class MetricsRegistry:
+    """Per-endpoint request totals rendered in the Prometheus text format.
+
+    Other components register collectors, callables returning a flat dict
+    of gauges, which are exported as `foodgram_<name>_<key>`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = defaultdict(EndpointStats)
+        self._collectors = {}
+
+    def register_collector(self, name, collector):
+        self._collectors[name] = collector
+
+    def observe(self, view, action, stats, seconds, response_bytes,
+                over_budget):
+        with self._lock:
+            endpoint = self._endpoints[(view, action)]
+            endpoint.requests += 1
+            endpoint.queries += stats.queries
+            endpoint.db_seconds += stats.db_seconds
+            endpoint.serializer_seconds += stats.serializer_seconds
+            endpoint.response_bytes += response_bytes
+            endpoint.seconds += seconds
+            endpoint.over_budget += over_budget
+            endpoint.buckets[bisect_left(DURATION_BUCKETS, seconds)] += 1
+
+    def render(self):
+        lines = []
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+        totals = (
+            ('requests_total', 'counter', 'requests'),
+            ('db_queries_total', 'counter', 'queries'),
+            ('db_seconds_total', 'counter', 'db_seconds'),
+            ('serializer_seconds_total', 'counter', 'serializer_seconds'),
+            ('response_bytes_total', 'counter', 'response_bytes'),
+            ('query_budget_exceeded_total', 'counter', 'over_budget'),
+        )
+        for name, kind, attr in totals:
+            lines.append(f'# TYPE foodgram_{name} {kind}')
+            for (view, action), endpoint in endpoints:
+                lines.append(
+                    f'foodgram_{name}{{view="{view}",action="{action}"}} '
+                    f'{getattr(endpoint, attr)}'
+                )
+        lines.append('# TYPE foodgram_request_seconds histogram')
+        for (view, action), endpoint in endpoints:
+            labels = f'view="{view}",action="{action}"'
+            cumulative = 0
+            for bound, count in zip(
+                DURATION_BUCKETS + ('+Inf', ), endpoint.buckets
+            ):
+                cumulative += count
+                lines.append(
+                    f'foodgram_request_seconds_bucket{{{labels},'
+                    f'le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'foodgram_request_seconds_sum{{{labels}}} {endpoint.seconds}'
+            )
+            lines.append(
+                f'foodgram_request_seconds_count{{{labels}}} '
+                f'{endpoint.requests}'
+            )
+        for name, collector in sorted(self._collectors.items()):
+            for key, value in sorted(collector().items()):
+                lines.append(f'# TYPE foodgram_{name}_{key} gauge')
+                lines.append(f'foodgram_{name}_{key} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
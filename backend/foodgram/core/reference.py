@@ -0,0 +1,56 @@
+import threading
+from types import MappingProxyType
+from typing import NamedTuple, Tuple
+
+from .routers import primary_reads
+from .versions import get_version
+
+
+class Snapshot(NamedTuple):
+    version: int
+    items: Tuple
+    by_id: MappingProxyType
+    by_slug: MappingProxyType
+
+
+class ReferenceRegistry:
+    """Process-wide snapshot of a small, rarely changing table.
+
+    The snapshot is loaded on first use and reloaded when the version of
+    `scope` changes, so reads cost a cache lookup instead of a query.
+    Snapshot objects are shared between requests and must not be modified.
+    """
+
+    def __init__(self, model, scope, slug_field=None):
+        self.model = model
+        self.scope = scope
+        self.slug_field = slug_field
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def __deepcopy__(self, memo):
+        # Serializer fields deep-copy their arguments, registries are shared.
+        return self
+
+    def _load(self, version):
+        with primary_reads():
+            items = tuple(self.model.objects.all())
+        by_slug = {}
+        if self.slug_field:
+            by_slug = {getattr(item, self.slug_field): item for item in items}
+        return Snapshot(
+            version=version,
+            items=items,
+            by_id=MappingProxyType({item.pk: item for item in items}),
+            by_slug=MappingProxyType(by_slug),
+        )
+
+    def get(self):
+        version = get_version(self.scope)
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.version != version:
+                    snapshot = self._snapshot = self._load(version)
+        return snapshot
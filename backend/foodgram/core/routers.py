@@ -0,0 +1,177 @@
+import asyncio
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from hashlib import sha256
+from time import monotonic
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+from .metrics import metrics
+
+REPLICA = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_routing = ContextVar('replica_routing', default=None)
+
+
+class RoutingState:
+    use_replica = False
+
+
+class ReplicaHealth:
+    """Cached result of a `SELECT 1` probe of the replica."""
+
+    def __init__(self, alias, interval):
+        self.alias = alias
+        self.interval = interval
+        self.healthy = True
+        self.checked_at = None
+        self._lock = threading.Lock()
+
+    def is_healthy(self):
+        now = monotonic()
+        if self.checked_at is not None and now - self.checked_at < (
+            self.interval
+        ):
+            return self.healthy
+        with self._lock:
+            if self.checked_at is None or now - self.checked_at >= (
+                self.interval
+            ):
+                self.healthy = self.probe()
+                self.checked_at = now
+        return self.healthy
+
+    def probe(self):
+        try:
+            with connections[self.alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except DatabaseError:
+            connections[self.alias].close()
+            return False
+        return True
+
+    def metrics(self):
+        return {'healthy': int(self.healthy)}
+
+
+replica_health = ReplicaHealth(
+    REPLICA, settings.REPLICA_HEALTH_CHECK_INTERVAL
+)
+metrics.register_collector('replica', replica_health.metrics)
+
+
+def replica_configured():
+    return settings.REPLICA_READS
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block.
+
+    Data cached under the current version of a scope must not come from
+    a replica that may not have replayed the write behind that version.
+    """
+    state = _routing.get()
+    if state is None:
+        yield
+        return
+    use_replica, state.use_replica = state.use_replica, False
+    try:
+        yield
+    finally:
+        state.use_replica = use_replica
+
+
+class ReplicaRouter:
+    """Send reads of replica-enabled requests to the replica.
+
+    Everything else, writes and migrations included, stays on `default`.
+    Tokens are always read from the primary, so a fresh login is never
+    rejected because of replication lag.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or not state.use_replica:
+            return None
+        if model._meta.label == 'authtoken.Token':
+            return None
+        if not replica_health.is_healthy():
+            return None
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA:
+            return False
+        return None
+
+
+def sticky_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    return 'replica-sticky:' + sha256(authorization.encode()).hexdigest()
+
+
+class ReplicaRoutingMiddleware:
+    """Route safe requests of views with `use_read_replica` to the replica.
+
+    A successful write pins the client's reads to the primary for
+    `REPLICA_STICKY_SECONDS`, so clients always read their own writes.
+    Clients are told apart by a hash of their Authorization header.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function like MiddlewareMixin.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token = _routing.set(RoutingState())
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        token = _routing.set(RoutingState())
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(request, response)
+
+    def finish(self, request, response):
+        if (request.method not in SAFE_METHODS
+                and response.status_code < 400 and replica_configured()):
+            key = sticky_key(request)
+            if key is not None:
+                cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _routing.get()
+        if (state is None or request.method not in SAFE_METHODS
+                or not replica_configured()):
+            return
+        view_class = getattr(view_func, 'cls', None)
+        if not getattr(view_class, 'use_read_replica', False):
+            return
+        key = sticky_key(request)
+        state.use_replica = key is None or not cache.get(key)
@@ -0,0 +1,77 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+
+from core.versions import get_version
+from users.models import User
+
+
+class BenchmarkCommandTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'generate_dataset', users=20, recipes=3, subscriptions=3,
+            favorites=5, carts=2, prefix='bench', stdout=StringIO()
+        )
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.baseline = Path(directory.name) / 'baseline.json'
+
+    def benchmark(self, *args, **kwargs):
+        stdout = StringIO()
+        call_command(
+            'benchmark', *args, iterations=2, warmup=1,
+            baseline=str(self.baseline), stdout=stdout, **kwargs
+        )
+        return stdout.getvalue()
+
+    def test_compares_with_baseline(self):
+        self.benchmark(save_baseline=True)
+        self.assertIn(
+            'recipe_list', json.loads(self.baseline.read_text())
+        )
+        # Timings of a tiny dataset are noise, compare query counts.
+        self.assertIn('No regressions.', self.benchmark(tolerance=100))
+
+    def test_reports_regressions(self):
+        self.benchmark(save_baseline=True)
+        baseline = json.loads(self.baseline.read_text())
+        queries = baseline['recipe_detail']['queries']
+        baseline['recipe_detail']['queries'] = 0
+        self.baseline.write_text(json.dumps(baseline))
+        with self.assertRaisesMessage(
+            CommandError, f'recipe_detail: {queries} queries, baseline 0'
+        ):
+            self.benchmark(tolerance=100)
+
+    def test_missing_baseline_fails(self):
+        with self.assertRaisesMessage(CommandError, 'No baseline'):
+            self.benchmark()
+
+    def test_refuses_users_outside_the_dataset(self):
+        User.objects.create_user(
+            email='real@example.com', username='real', first_name='real',
+            last_name='real', password='Pa55word-42'
+        )
+        with self.assertRaisesMessage(CommandError, 'No dataset'):
+            self.benchmark(save_baseline=True, prefix='real')
+        self.assertFalse(Token.objects.exists())
+
+    def test_leaves_tokens_and_cache_alone(self):
+        cache.set('unrelated', 'kept')
+        version = get_version('recipes')
+        self.benchmark('--cold', save_baseline=True)
+        self.assertEqual(cache.get('unrelated'), 'kept')
+        self.assertEqual(get_version('recipes'), version)
+        self.assertFalse(Token.objects.exists())
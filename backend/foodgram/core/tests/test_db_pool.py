@@ -0,0 +1,99 @@
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase
+
+from core.db_pool.base import DatabaseWrapper, close_pools
+from core.db_pool.pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    closed = 0
+
+    def __init__(self):
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        self.pool = ConnectionPool(max_size=2, timeout=0)
+
+    def test_released_connection_is_reused(self):
+        first = self.pool.acquire(FakeConnection)
+        self.pool.release(first)
+        self.assertIs(self.pool.acquire(FakeConnection), first)
+        self.assertEqual(self.pool.created, 1)
+        self.assertEqual(self.pool.checkouts, 2)
+
+    def test_release_rolls_back(self):
+        conn = self.pool.acquire(FakeConnection)
+        self.pool.release(conn)
+        self.assertEqual(conn.rollbacks, 1)
+
+    def test_checkout_times_out_when_exhausted(self):
+        self.pool.acquire(FakeConnection)
+        self.pool.acquire(FakeConnection)
+        with self.assertRaises(PoolTimeoutError):
+            self.pool.acquire(FakeConnection)
+        self.assertEqual(self.pool.timeouts, 1)
+
+    def test_not_reusable_connection_is_closed(self):
+        conn = self.pool.acquire(FakeConnection)
+        self.pool.release(conn, reusable=False)
+        self.assertTrue(conn.closed)
+        self.assertIsNot(self.pool.acquire(FakeConnection), conn)
+        self.assertEqual(self.pool.metrics()['size'], 1)
+
+    def test_connection_past_lifetime_is_not_reused(self):
+        conn = self.pool.acquire(FakeConnection)
+        with mock.patch.object(self.pool, 'max_lifetime', 0):
+            self.pool.release(conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(self.pool.metrics()['idle'], 0)
+
+    def test_close_idle(self):
+        idle = self.pool.acquire(FakeConnection)
+        in_use = self.pool.acquire(FakeConnection)
+        self.pool.release(idle)
+        self.pool.close_idle()
+        self.assertTrue(idle.closed)
+        self.assertFalse(in_use.closed)
+        self.assertEqual(self.pool.metrics()['size'], 1)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Needs PostgreSQL.')
+class PooledBackendTests(SimpleTestCase):
+
+    def get_wrapper(self, **settings):
+        settings_dict = {**connection.settings_dict, **settings}
+        if settings_dict['POOL'] is None:
+            del settings_dict['POOL']
+        wrapper = DatabaseWrapper(settings_dict, alias='pooled')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_closed_connection_returns_to_pool(self):
+        wrapper = self.get_wrapper(POOL={'MAX_SIZE': 1})
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close()
+        self.assertFalse(raw.closed)
+        wrapper.ensure_connection()
+        self.assertIs(wrapper.connection, raw)
+        wrapper.close()
+        close_pools(connection.settings_dict['NAME'])
+        self.assertTrue(raw.closed)
+
+    def test_no_pool_without_pool_settings(self):
+        wrapper = self.get_wrapper(POOL=None)
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close()
+        self.assertTrue(raw.closed)
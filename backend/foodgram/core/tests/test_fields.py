@@ -0,0 +1,103 @@
+import base64
+import os
+import struct
+import zlib
+from io import BytesIO
+
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+
+from core.fields import DECODE_CHUNK_SIZE, Base64ImageField
+
+
+def png_bytes(size):
+    buffer = BytesIO()
+    # Noise doesn't compress, so the payload spans several chunks.
+    Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3)).save(
+        buffer, 'PNG'
+    )
+    return buffer.getvalue()
+
+
+def png_chunk(kind, data):
+    return (struct.pack('>I', len(data)) + kind + data
+            + struct.pack('>I', zlib.crc32(kind + data)))
+
+
+def png_header(width, height):
+    """A PNG that only declares its size, the way decompression bombs do."""
+    return (b'\x89PNG\r\n\x1a\n'
+            + png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height,
+                                             8, 2, 0, 0, 0))
+            + png_chunk(b'IDAT', zlib.compress(b''))
+            + png_chunk(b'IEND', b''))
+
+
+class Base64ImageFieldTest(SimpleTestCase):
+
+    def decode(self, payload):
+        file = Base64ImageField().decode('data:image/png;base64,' + payload)
+        return file.read()
+
+    def test_plain_payload(self):
+        content = png_bytes((4, 4))
+        self.assertEqual(
+            self.decode(base64.b64encode(content).decode()), content
+        )
+
+    def test_wrapped_payload(self):
+        content = png_bytes((200, 200))
+        self.assertGreater(len(content), DECODE_CHUNK_SIZE)
+        wrapped = base64.encodebytes(content).decode()
+        for payload in (wrapped, wrapped.replace('\n', '\r\n')):
+            with self.subTest(separator=repr(payload[76:78])):
+                self.assertEqual(self.decode(payload), content)
+
+    def test_invalid_payload(self):
+        with self.assertRaises(ValidationError):
+            self.decode('not*base64')
+
+    def test_incomplete_payload(self):
+        payload = base64.b64encode(png_bytes((4, 4))).decode()
+        with self.assertRaises(ValidationError):
+            self.decode(payload[:-1])
+
+    def assert_rejected(self, content, code):
+        with self.assertRaises(ValidationError) as context:
+            self.decode(base64.b64encode(content).decode())
+        self.assertEqual(context.exception.get_codes(), [code])
+
+    @override_settings(BASE64_IMAGE_MAX_BYTES=1024)
+    def test_too_large(self):
+        self.assert_rejected(png_bytes((100, 100)), 'too_large')
+
+    @override_settings(BASE64_IMAGE_MAX_BYTES=1024)
+    def test_whitespace_does_not_count_towards_size(self):
+        content = png_bytes((15, 15))
+        self.assertLess(len(content), 1024)
+        payload = base64.b64encode(content).decode()
+        wrapped = '\r\n'.join(
+            payload[offset:offset + 4] for offset in range(0, len(payload), 4)
+        )
+        self.assertGreater(len(wrapped) // 4 * 3, 1024)
+        self.assertEqual(self.decode(wrapped), content)
+
+    @override_settings(BASE64_IMAGE_MAX_PIXELS=399)
+    def test_too_many_pixels(self):
+        self.assert_rejected(png_bytes((20, 20)), 'too_many_pixels')
+
+    @override_settings(BASE64_IMAGE_MAX_PIXELS=400)
+    def test_pixel_limit_is_inclusive(self):
+        content = png_bytes((20, 20))
+        self.assertEqual(
+            self.decode(base64.b64encode(content).decode()), content
+        )
+
+    @override_settings(BASE64_IMAGE_MAX_PIXELS=10 ** 12)
+    def test_decompression_bomb(self):
+        # Past twice Image.MAX_IMAGE_PIXELS, Pillow refuses the header.
+        self.assert_rejected(png_header(50_000, 50_000), 'too_many_pixels')
+
+    def test_large_declared_size(self):
+        self.assert_rejected(png_header(8_000, 8_000), 'too_many_pixels')
@@ -0,0 +1,106 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.versions import get_version
+from recipes.images import generate_variants
+from recipes.models import Recipe
+from users.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, RECIPE_IMAGE_WIDTHS=(320, 640),
+                   RECIPE_IMAGE_FORMATS=('webp',))
+class ImageVariantsTest(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='author', last_name='author'
+        )
+
+    def create_recipe(self, name, width=800):
+        buffer = BytesIO()
+        Image.new('RGB', (width, width // 2), 'red').save(buffer, 'PNG')
+        image = default_storage.save(
+            'recipes/images/test.png', ContentFile(buffer.getvalue())
+        )
+        return Recipe.objects.create(
+            author=self.author, name=name, image=image, text='Text',
+            cooking_time=10
+        )
+
+    def test_variants_are_recorded(self):
+        recipe = self.create_recipe('Recipe')
+        generate_variants(recipe.pk, recipe.image.name)
+        recipe.refresh_from_db()
+        self.assertEqual(
+            [(variant['format'], variant['width'])
+             for variant in recipe.image_variants],
+            [('webp', 320), ('webp', 640)]
+        )
+        for variant in recipe.image_variants:
+            self.assertTrue(default_storage.exists(variant['name']))
+
+    def test_original_is_never_upscaled(self):
+        recipe = self.create_recipe('Recipe', width=200)
+        variants = generate_variants(recipe.pk, recipe.image.name)
+        self.assertEqual([variant['width'] for variant in variants], [200])
+
+    def test_recorded_variants_bump_recipes_version(self):
+        recipe = self.create_recipe('Recipe')
+        version = get_version('recipes')
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_variants(recipe.pk, recipe.image.name)
+        self.assertGreater(get_version('recipes'), version)
+
+    def test_replaced_image_drops_variants(self):
+        recipe = self.create_recipe('Recipe')
+        old_image = recipe.image.name
+        recipe.image = self.create_recipe('Other').image.name
+        recipe.save()
+        version = get_version('recipes')
+        with self.captureOnCommitCallbacks(execute=True):
+            variants = generate_variants(recipe.pk, old_image)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_variants, [])
+        for variant in variants:
+            self.assertFalse(default_storage.exists(variant['name']))
+        self.assertEqual(get_version('recipes'), version)
+
+    def test_command_fills_missing_variants(self):
+        recipe = self.create_recipe('Recipe')
+        broken = Recipe.objects.create(
+            author=self.author, name='Broken', text='Text', cooking_time=10,
+            image=default_storage.save(
+                'recipes/images/broken.png', ContentFile(b'not an image')
+            )
+        )
+        done = self.create_recipe('Done')
+        done.image_variants = [{'format': 'webp', 'width': 320,
+                                'name': 'recipes/images/variants/done.webp'}]
+        done.save()
+        stdout, stderr = StringIO(), StringIO()
+
+        call_command('generate_image_variants', stdout=stdout, stderr=stderr)
+
+        recipe.refresh_from_db()
+        self.assertEqual(len(recipe.image_variants), 2)
+        self.assertIn(broken.image.name, stderr.getvalue())
+        self.assertIn('for 1 recipes, 1 failed', stdout.getvalue())
+        done.refresh_from_db()
+        self.assertEqual(len(done.image_variants), 1)
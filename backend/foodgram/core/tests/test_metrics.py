@@ -0,0 +1,122 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.views import TagViewSet
+from core.instrumentation import QueryBudgetExceededError, RequestStats
+from core.metrics import MetricsRegistry
+from recipes.models import Tag
+
+
+class MetricsViewTests(SimpleTestCase):
+
+    def test_disabled_without_token(self):
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_requires_token(self):
+        for header in ('', 'Bearer wrong', 'secret'):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    '/metrics', HTTP_AUTHORIZATION=header
+                )
+                self.assertEqual(response.status_code, 401)
+
+        response = self.client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Type'], 'text/plain; version=0.0.4'
+        )
+
+
+class InstrumentationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.registry = MetricsRegistry()
+        for target in ('core.instrumentation.metrics', 'core.views.metrics'):
+            patcher = mock.patch(target, self.registry)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        Tag.objects.create(name='Завтрак', color='#E26C2D', slug='breakfast')
+
+    def scrape(self):
+        with override_settings(METRICS_TOKEN='secret'):
+            response = self.client.get(
+                '/metrics', HTTP_AUTHORIZATION='Bearer secret'
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode().splitlines()
+
+    def test_server_timing_counts_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'desc="{len(context)} queries"',
+                      response['Server-Timing'])
+        self.assertIn('serializer;dur=', response['Server-Timing'])
+
+    def test_requests_are_aggregated_per_action(self):
+        for _ in range(2):
+            self.client.get('/api/tags/')
+        self.client.get('/api/tags/0/')
+        lines = self.scrape()
+        labels = 'view="TagViewSet",action="{}"'
+        self.assertIn(
+            f'foodgram_requests_total{{{labels.format("list")}}} 2', lines
+        )
+        self.assertIn(
+            f'foodgram_requests_total{{{labels.format("retrieve")}}} 1',
+            lines
+        )
+        self.assertIn(
+            f'foodgram_request_seconds_count{{{labels.format("list")}}} 2',
+            lines
+        )
+
+    def test_over_budget_is_logged(self):
+        with mock.patch.dict(TagViewSet.query_budgets, list=-1):
+            with self.assertLogs('core.instrumentation', 'WARNING') as logs:
+                response = self.client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('TagViewSet.list ran', logs.output[0])
+        self.assertIn(
+            'foodgram_query_budget_exceeded_total'
+            '{view="TagViewSet",action="list"} 1',
+            self.scrape()
+        )
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_over_budget_raises_when_strict(self):
+        with mock.patch.dict(TagViewSet.query_budgets, list=-1):
+            with self.assertRaises(QueryBudgetExceededError):
+                self.client.get('/api/tags/')
+
+    def test_collectors_are_exported(self):
+        self.registry.register_collector('pool', lambda: {'size': 3})
+        self.assertIn('foodgram_pool_size 3', self.scrape())
+
+
+class MetricsRegistryTests(SimpleTestCase):
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        stats = RequestStats()
+        for seconds in (0.001, 0.2, 0.2, 10):
+            registry.observe('View', 'list', stats, seconds, 0, False)
+        lines = registry.render().splitlines()
+        labels = 'view="View",action="list"'
+        for bound, count in (('0.005', 1), ('0.1', 1), ('0.25', 3),
+                             ('5', 3), ('+Inf', 4)):
+            with self.subTest(le=bound):
+                self.assertIn(
+                    f'foodgram_request_seconds_bucket{{{labels},'
+                    f'le="{bound}"}} {count}',
+                    lines
+                )
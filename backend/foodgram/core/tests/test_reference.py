@@ -0,0 +1,56 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.checks import check_shared_cache
+from recipes import reference
+from recipes.models import Ingredient
+
+LOCMEM = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}}
+MEMCACHED = {'default': {
+    'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'LOCATION': 'memcached:11211',
+}}
+
+
+class ReferenceSnapshotTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        Ingredient.objects.create(name='соль', measure='г')
+
+    def names(self):
+        return [item.name for item in reference.ingredients.get().items]
+
+    def test_loadfixtures_refreshes_snapshot(self):
+        self.assertEqual(self.names(), ['соль'])
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'ingredients.csv'
+            path.write_text('перец,г\n', encoding='utf-8')
+            call_command('loadfixtures', str(path), stdout=StringIO())
+        self.assertEqual(sorted(self.names()), ['перец', 'соль'])
+
+    def test_evicted_version_does_not_match_old_snapshot(self):
+        self.assertEqual(self.names(), ['соль'])
+        Ingredient.objects.bulk_create([Ingredient(name='перец', measure='г')])
+        cache.clear()
+        self.assertEqual(sorted(self.names()), ['перец', 'соль'])
+
+
+class SharedCacheCheckTest(TestCase):
+
+    @override_settings(TESTING=False, CACHES=LOCMEM)
+    def test_per_process_cache_is_an_error(self):
+        self.assertEqual(
+            [error.id for error in check_shared_cache(None)], ['core.E001']
+        )
+
+    @override_settings(TESTING=False, CACHES=MEMCACHED)
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,159 @@
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.db import OperationalError, connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache
+from core.routers import REPLICA, replica_health
+from recipes.models import Recipe
+from users.models import User
+
+
+@override_settings(REPLICA_READS=True)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Reads of replica-enabled views go to the replica, a test mirror.
+
+    The mirror is a second connection to the test database, so the
+    data has to be committed, hence the transaction test case.
+    """
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        replica_health.healthy = True
+        replica_health.checked_at = None
+        self.addCleanup(setattr, replica_health, 'checked_at', None)
+        # Fixtures the replica has long caught up with.
+        with self.settings(REPLICA_READS=False):
+            self.reader = self.create_user('reader')
+            self.other = self.create_user('other')
+            self.author = self.create_user('author')
+            self.recipe = Recipe.objects.create(
+                author=self.author, name='Recipe', text='Text',
+                image='recipes/images/test.png', cooking_time=10
+            )
+        self.url = f'/api/recipes/{self.recipe.pk}/'
+
+    @staticmethod
+    def create_user(name):
+        return User.objects.create_user(
+            email=f'{name}@example.com', username=name, first_name=name,
+            last_name=name, password='Pa55word-42'
+        )
+
+    @staticmethod
+    def client_for(user):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    def get(self, client, url):
+        """Return the response and the queries run by each database."""
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(connections[REPLICA]) as replica:
+                response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(primary), len(replica)
+
+    def test_reads_go_to_replica(self):
+        _, primary, replica = self.get(self.client_for(self.reader), self.url)
+        self.assertGreater(replica, 0)
+        # Only the token lookup.
+        self.assertEqual(primary, 1)
+
+    def test_anonymous_cached_reads_go_to_primary(self):
+        _, primary, replica = self.get(APIClient(), self.url)
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
+
+    def test_writes_pin_the_client_to_primary(self):
+        client = self.client_for(self.reader)
+        response = client.post(f'{self.url}favorite/')
+        self.assertEqual(response.status_code, 201)
+
+        response, _, replica = self.get(client, self.url)
+        self.assertEqual(replica, 0)
+        self.assertTrue(response.data['is_favorited'])
+
+        _, _, replica = self.get(self.client_for(self.other), self.url)
+        self.assertGreater(replica, 0)
+
+    def test_unhealthy_replica_fails_over_to_primary(self):
+        client = self.client_for(self.reader)
+        with mock.patch.object(
+            connections[REPLICA], 'cursor',
+            side_effect=OperationalError('replica is down')
+        ):
+            _, primary, _ = self.get(client, self.url)
+        self.assertFalse(replica_health.healthy)
+        self.assertGreater(primary, 1)
+
+    def lag_replica(self):
+        """Keep the replica at the data committed so far.
+
+        A repeatable read transaction on the replica connection doesn't
+        see later writes, like a replica that didn't replay them yet.
+        """
+        replica = connections[REPLICA]
+        replica.set_autocommit(False)
+        with replica.cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            cursor.execute('SELECT 1')
+
+        def catch_up():
+            replica.rollback()
+            replica.set_autocommit(True)
+        self.addCleanup(catch_up)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Needs PostgreSQL.')
+    def test_lagging_replica_body_is_not_tagged_fresh(self):
+        client = self.client_for(self.author)
+        response, _, replica = self.get(client, '/api/users/me/')
+        self.assertGreater(replica, 0)
+        self.lag_replica()
+
+        # Someone else's write, the author's client isn't pinned.
+        self.assertEqual(
+            self.client_for(self.reader).post(
+                f'/api/users/{self.author.pk}/subscribe/'
+            ).status_code,
+            201
+        )
+
+        response = client.get(
+            '/api/users/me/', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['subscribers_count'], 1)
+        self.assertEqual(
+            client.get(
+                '/api/users/me/', HTTP_IF_NONE_MATCH=response['ETag']
+            ).status_code,
+            304
+        )
+
+    def test_recently_bumped_scopes_are_read_from_primary(self):
+        client = self.client_for(self.other)
+        _, _, replica = self.get(client, self.url)
+        self.assertGreater(replica, 0)
+
+        self.recipe.name = 'Renamed'
+        self.recipe.save()
+
+        response, _, replica = self.get(client, self.url)
+        self.assertEqual(replica, 0)
+        self.assertEqual(response.data['name'], 'Renamed')
+        # Scopes that didn't change still use the replica.
+        _, _, replica = self.get(client, '/api/users/me/')
+        self.assertGreater(replica, 0)
+
+    @override_settings(REPLICA_READS=False)
+    def test_without_replica_reads(self):
+        _, _, replica = self.get(self.client_for(self.reader), self.url)
+        self.assertEqual(replica, 0)
@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+KEY_PREFIX = 'version'
+BUMPED_KEY_PREFIX = 'bumped'
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def _key(scope):
+    return f'{KEY_PREFIX}:{scope}'
+
+
+def _bumped_key(scope):
+    return f'{BUMPED_KEY_PREFIX}:{scope}'
+
+
+def _initial_version():
+    # A version evicted from the cache restarts past every value handed
+    # out before, or snapshots and ETags taken back then would match again.
+    return time.time_ns()
+
+
+def get_versions(*scopes):
+    """Return the current versions of `scopes`, in the same order."""
+    keys = [_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        initial = _initial_version()
+        for key in missing:
+            cache.add(key, initial, timeout=None)
+            versions[key] = initial
+        versions.update(cache.get_many(missing))
+    return tuple(versions[key] for key in keys)
+
+
+def get_version(scope):
+    return get_versions(scope)[0]
+
+
+def bump_version(*scopes):
+    for scope in scopes:
+        key = _key(scope)
+        cache.add(key, _initial_version(), timeout=None)
+        cache.incr(key)
+    if settings.REPLICA_READS:
+        cache.set_many(
+            {_bumped_key(scope): True for scope in scopes},
+            settings.REPLICA_STICKY_SECONDS
+        )
+
+
+def recently_bumped(*scopes):
+    """Whether any of `scopes` was bumped within `REPLICA_STICKY_SECONDS`.
+
+    Replicas may not have replayed the writes behind such a version yet.
+    """
+    if not settings.REPLICA_READS:
+        return False
+    return bool(cache.get_many([_bumped_key(scope) for scope in scopes]))
+
+
+def bump_version_on_commit(*scopes):
+    """Bump versions once the current transaction, if any, commits."""
+    transaction.on_commit(lambda: bump_version(*scopes))
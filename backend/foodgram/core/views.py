@@ -0,0 +1,26 @@
+from hmac import compare_digest
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from .metrics import metrics
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, not proxied by nginx.
+
+    Scrapers authenticate with `Authorization: Bearer <METRICS_TOKEN>`,
+    without a configured token the endpoint doesn't exist.
+    """
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    expected = f'Bearer {settings.METRICS_TOKEN}'
+    if not compare_digest(
+        request.META.get('HTTP_AUTHORIZATION', '').encode(), expected.encode()
+    ):
+        response = HttpResponse(status=401)
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    return HttpResponse(
+        metrics.render(), content_type='text/plain; version=0.0.4'
+    )
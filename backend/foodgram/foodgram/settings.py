@@ -1,4 +1,5 @@
 import os
+import sys
 
 from pathlib import Path
 from dotenv import find_dotenv, load_dotenv
@@ -12,6 +13,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 DEBUG = True
 
+TESTING = sys.argv[1:2] == ['test']
+
 ALLOWED_HOSTS = ['*']
 
 
@@ -35,6 +38,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.InstrumentationMiddleware',
+    'core.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -73,10 +78,72 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', 'postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'password'),
         'HOST': os.getenv('DB_HOST', 'db'),
-        'PORT': os.getenv('DB_PORT', '5432')
+        'PORT': os.getenv('DB_PORT', '5432'),
     }
 }
 
+# Connection pooling is opt-in: with DB_POOL_SIZE set, PostgreSQL
+# connections are kept in a per-process pool by core.db_pool.
+if (os.getenv('DB_POOL_SIZE')
+        and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'):
+    DATABASES['default'].update({
+        'ENGINE': 'core.db_pool',
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_SIZE')),
+            'TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT') or 10),
+            'MAX_LIFETIME': 1800,
+            'MAX_IDLE': 300,
+            'HEALTH_CHECK_AFTER': 5,
+        },
+    })
+
+# Optional read replica, see core.routers.ReplicaRouter.
+if os.getenv('DB_REPLICA_HOST') or os.getenv('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'HOST': os.getenv('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+# Tests get the replica as a mirror of the test database, reads are sent
+# to it only by the tests that enable REPLICA_READS.
+REPLICA_READS = 'replica' in DATABASES and not TESTING
+if TESTING:
+    DATABASES['replica'] = {
+        **DATABASES['default'], 'TEST': {'MIRROR': 'default'}
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+REPLICA_HEALTH_CHECK_INTERVAL = 10
+
+
+# Versions and cached responses must be seen by every worker, so only
+# tests run on a per-process cache.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.memcached.PyMemcacheCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'memcached:11211'),
+    }
+}
+if TESTING:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'foodgram',
+    }
+
+RESPONSE_CACHE_TIMEOUT = 300
+# How long popularity counters in shared recipe reads may lag behind.
+COUNTERS_MAX_AGE = RESPONSE_CACHE_TIMEOUT
+
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10_000))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 60))
+TOKEN_CACHE_SHARED = os.getenv('TOKEN_CACHE_SHARED', 'False') == 'True'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -118,13 +185,54 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'DEFAULT_PAGINATION_CLASS':
         'api.paginators.CustomPagination',
     'PAGE_SIZE': 6,
 }
 
+# Count strategy per view `basename` or `basename-action`: exact,
+# estimated (Postgres planner estimates) or cached (short-lived exact).
+PAGINATION_COUNT_STRATEGIES = {
+    'recipes': 'cached',
+    'users-list': 'estimated',
+}
+PAGINATION_EXACT_COUNT_LIMIT = 1000
+
+# Serve recipe, tag and ingredient reads from a thread pool under ASGI,
+# each pool thread holds its own database connection.
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'False') == 'True'
+
+# Serialize safe requests with projections compiled from the serializers,
+# see api.projections.
+PROJECTED_READS = os.getenv('PROJECTED_READS', 'True') == 'True'
+
+# Raise instead of logging when a view runs over its `query_budgets`.
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', 'False') == 'True'
+# Bearer token of the /metrics scrape endpoint, disabled when empty.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+PAGINATION_COUNT_CACHE_TIMEOUT = 30
+
+BASE64_IMAGE_MAX_BYTES = int(os.getenv('BASE64_IMAGE_MAX_BYTES', 10 * 2 ** 20))
+BASE64_IMAGE_MAX_PIXELS = int(os.getenv('BASE64_IMAGE_MAX_PIXELS', 40_000_000))
+BASE64_IMAGE_SPOOL_SIZE = 2 ** 20
+
+RECIPE_IMAGE_WIDTHS = (320, 640, 1280)
+RECIPE_IMAGE_FORMATS = ('webp',)
+RECIPE_IMAGE_WORKERS = int(os.getenv('RECIPE_IMAGE_WORKERS', 2))
+
+SHOPPING_LIST_PDF_WORKERS = int(os.getenv('SHOPPING_LIST_PDF_WORKERS', 2))
+SHOPPING_LIST_PDF_TIMEOUT = 30
+# TrueType font with Cyrillic glyphs, the built-in PDF fonts have none.
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT', str(BASE_DIR / 'data' / 'fonts' / 'DejaVuSans.ttf')
+)
+
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',
 ]
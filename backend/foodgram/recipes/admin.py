@@ -5,13 +5,11 @@ from .models import Ingredient, Recipe, Tag
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ['name', 'author', 'created', 'number_of_additions']
+    list_display = ['name', 'author', 'created', 'favorites_count',
+                    'carts_count']
     search_fields = ['name', 'author__username', '^tags__name']
     list_filter = ['author', 'name', 'tags']
-    readonly_fields = ['number_of_additions']
-
-    def number_of_additions(self, obj: Recipe):
-        return obj.shopping_users.all().count()
+    readonly_fields = ['favorites_count', 'carts_count']
 
 
 @admin.register(Ingredient)
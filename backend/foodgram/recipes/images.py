@@ -0,0 +1,106 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps, features
+
+from core.versions import bump_version_on_commit
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = 'recipes/images/variants'
+SAVE_OPTIONS = {
+    'webp': {'quality': 80, 'method': 4},
+    'avif': {'quality': 60},
+}
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.RECIPE_IMAGE_WORKERS,
+    thread_name_prefix='recipe-images'
+)
+
+
+def supported_formats():
+    return [
+        fmt for fmt in settings.RECIPE_IMAGE_FORMATS if features.check(fmt)
+    ]
+
+
+def schedule_variants(recipe):
+    """Generate image variants of `recipe` once the transaction commits."""
+    recipe_id, image_name = recipe.pk, recipe.image.name
+    transaction.on_commit(
+        lambda: _executor.submit(_generate_in_worker, recipe_id, image_name)
+    )
+
+
+def delete_variants(variants):
+    for variant in variants:
+        default_storage.delete(variant['name'])
+
+
+def delete_image(image_name, variants):
+    """Delete a replaced image and its variants once the transaction commits.
+
+    A rolled back update keeps pointing at them, so they must stay.
+    """
+    def delete():
+        default_storage.delete(image_name)
+        delete_variants(variants)
+    transaction.on_commit(delete)
+
+
+def render_variants(image_name):
+    with default_storage.open(image_name) as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image.load()
+    mode = 'RGBA' if 'A' in image.getbands() else 'RGB'
+    image = image.convert(mode)
+    stem = PurePosixPath(image_name).stem
+    variants = []
+    for width in sorted(settings.RECIPE_IMAGE_WIDTHS):
+        # Never upscale, the original is the largest candidate anyway.
+        if variants and width > image.width:
+            break
+        resized = image.copy()
+        resized.thumbnail((width, image.height))
+        for fmt in supported_formats():
+            buffer = BytesIO()
+            resized.save(buffer, fmt.upper(), **SAVE_OPTIONS.get(fmt, {}))
+            name = default_storage.save(
+                f'{VARIANTS_DIR}/{stem}_{resized.width}.{fmt}',
+                ContentFile(buffer.getvalue())
+            )
+            variants.append(
+                {'format': fmt, 'width': resized.width, 'name': name}
+            )
+    return variants
+
+
+def generate_variants(recipe_id, image_name):
+    """Render and record variants, skipping recipes whose image changed."""
+    variants = render_variants(image_name)
+    updated = Recipe.objects.filter(
+        pk=recipe_id, image=image_name
+    ).update(image_variants=variants)
+    if updated:
+        bump_version_on_commit('recipes')
+    else:
+        delete_variants(variants)
+    return variants
+
+
+def _generate_in_worker(recipe_id, image_name):
+    try:
+        generate_variants(recipe_id, image_name)
+    except Exception:
+        logger.exception('Failed to generate variants of %s', image_name)
+    finally:
+        connection.close()
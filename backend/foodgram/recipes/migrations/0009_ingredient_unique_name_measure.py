@@ -0,0 +1,66 @@
+# Generated by Django 3.2 on 2026-10-17 04:20
+
+from django.db import migrations, models
+
+
+def merge_rows(model, survivor_id, duplicate_ids, key, amount):
+    """Point `model` rows at the survivor, adding up clashing amounts."""
+    kept = {
+        getattr(row, key): row
+        for row in model.objects.filter(ingredient_id=survivor_id)
+    }
+    for row in model.objects.filter(ingredient_id__in=duplicate_ids):
+        other = kept.get(getattr(row, key))
+        if other is None:
+            row.ingredient_id = survivor_id
+            row.save(update_fields=['ingredient'])
+            kept[getattr(row, key)] = row
+        else:
+            setattr(other, amount, getattr(other, amount)
+                    + getattr(row, amount))
+            other.save(update_fields=[amount])
+            row.delete()
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Keep the oldest of each (name, measure) and fold the rest into it."""
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    ShoppingCartIngredient = apps.get_model(
+        'recipes', 'ShoppingCartIngredient'
+    )
+    duplicates = Ingredient.objects.values('name', 'measure').annotate(
+        count=models.Count('pk'), survivor_id=models.Min('pk')
+    ).filter(count__gt=1).order_by()
+    for group in duplicates:
+        survivor_id = group['survivor_id']
+        duplicate_ids = list(
+            Ingredient.objects.filter(
+                name=group['name'], measure=group['measure']
+            ).exclude(pk=survivor_id).values_list('pk', flat=True)
+        )
+        merge_rows(IngredientRecipe, survivor_id, duplicate_ids,
+                   'recipe_id', 'amount')
+        merge_rows(ShoppingCartIngredient, survivor_id, duplicate_ids,
+                   'user_id', 'total_amount')
+        Ingredient.objects.filter(pk__in=duplicate_ids).delete()
+    if schema_editor.connection.vendor == 'postgresql':
+        # Pending deferred FK checks would block the ALTER TABLE below.
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_shoppingcartingredient'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measure'), name='unique_ingredient_name_measure'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 3.2 on 2026-10-17 04:33
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_related(model, field):
+    return Coalesce(models.Subquery(
+        model.objects.filter(**{field: models.OuterRef('pk')}).order_by()
+        .values(field).annotate(total=models.Count('pk')).values('total')
+    ), 0)
+
+
+def merge_relations(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Favorite = apps.get_model('recipes', 'Favorite')
+    ShoppingCart = apps.get_model('recipes', 'ShoppingCart')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    ShoppingCartIngredient = apps.get_model(
+        'recipes', 'ShoppingCartIngredient'
+    )
+    for field, model in (('favorited_users', Favorite),
+                         ('shopping_users', ShoppingCart)):
+        through = Recipe._meta.get_field(field).remote_field.through
+        model.objects.bulk_create(
+            (model(user_id=row.user_id, recipe_id=row.recipe_id)
+             for row in through.objects.iterator()),
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+    Recipe.objects.update(
+        favorites_count=count_related(Favorite, 'recipe'),
+        carts_count=count_related(ShoppingCart, 'recipe'),
+    )
+    ShoppingCartIngredient.objects.all().delete()
+    totals = IngredientRecipe.objects.filter(
+        recipe__shopping_cart__isnull=False
+    ).values(
+        'recipe__shopping_cart__user_id', 'ingredient_id'
+    ).annotate(total_amount=models.Sum('amount')).order_by()
+    ShoppingCartIngredient.objects.bulk_create(
+        ShoppingCartIngredient(
+            user_id=total['recipe__shopping_cart__user_id'],
+            ingredient_id=total['ingredient_id'],
+            total_amount=total['total_amount']
+        ) for total in totals
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_relations, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='recipe',
+            name='favorited_users',
+        ),
+        migrations.RemoveField(
+            model_name='recipe',
+            name='shopping_users',
+        ),
+    ]
@@ -1,7 +1,9 @@
 from django.db import models
+from django.db.models import Exists, F, OuterRef, Prefetch, Window
+from django.db.models.functions import RowNumber
 from django.core.validators import MinValueValidator
 
-from users.models import User
+from users.models import User, is_subscribed
 
 
 class Ingredient(models.Model):
@@ -19,6 +21,12 @@ class Ingredient(models.Model):
         ordering = ['name']
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measure'],
+                name='unique_ingredient_name_measure'
+            )
+        ]
 
     def __str__(self):
         return f'{self.name} {self.measure}'
@@ -48,12 +56,65 @@ class Tag(models.Model):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    def with_related(self):
+        """Load tags and ingredients of every recipe in two queries."""
+        return self.prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe',
+                queryset=IngredientRecipe.objects.select_related('ingredient')
+            ),
+        )
+
+    def with_user_flags(self, user):
+        """Annotate favorite, shopping cart and subscription flags."""
+        if user.is_anonymous:
+            return self.select_related('author')
+        authors = User.objects.annotate(is_subscribed=is_subscribed(user))
+        return self.prefetch_related(
+            Prefetch('author', queryset=authors)
+        ).annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+        )
+
+    def latest_by_author(self, authors, limit):
+        """Return up to `limit` newest recipes of each author in one query.
+
+        Django can't filter on window functions yet, so the ranked query
+        is wrapped in a raw outer SELECT.
+        """
+        if not authors:
+            # `author__in=[]` can't be compiled to SQL at all.
+            return self.none()
+        ranked = self.filter(author__in=authors).annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F('author_id')],
+                order_by=[F('created').desc(), F('id').desc()],
+            )
+        )
+        sql, params = ranked.query.sql_with_params()
+        return self.raw(
+            f'SELECT * FROM ({sql}) ranked '
+            'WHERE ranked.row_number <= %s '
+            'ORDER BY ranked.author_id, ranked.row_number',
+            params + (limit,),
+        )
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         verbose_name='Автор',
         related_name='recipes',
+        db_index=False
     )
     name = models.CharField(
         max_length=200,
@@ -64,6 +125,12 @@ class Recipe(models.Model):
         upload_to='recipes/images/',
         verbose_name='Картинка',
     )
+    image_variants = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии картинки'
+    )
     text = models.TextField(
         verbose_name='Описание'
     )
@@ -89,20 +156,33 @@ class Recipe(models.Model):
         verbose_name='Дата и время создания',
         auto_now_add=True
     )
-    shopping_users = models.ManyToManyField(
-        User,
-        verbose_name='Пользователи, которые добавили рецепт в корзину'
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False
     )
-    favorited_users = models.ManyToManyField(
-        User,
-        verbose_name='Пользователи, которые добавили рецепт в избранное',
-        related_name='favorited'
+    carts_count = models.PositiveIntegerField(
+        verbose_name='В корзинах',
+        default=0,
+        editable=False
     )
 
+    objects = RecipeQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created']
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['-created', '-id'],
+                name='recipe_created_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-created', '-id'],
+                name='recipe_author_created_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'name'],
@@ -123,7 +203,8 @@ class IngredientRecipe(models.Model):
     recipe = models.ForeignKey(
         Recipe,
         related_name='recipe',
-        on_delete=models.CASCADE)
+        on_delete=models.CASCADE,
+        db_index=False)
     amount = models.IntegerField(
         validators=[MinValueValidator(1, 'Сумма не может быть меньше  "1".')]
     )
@@ -131,6 +212,13 @@ class IngredientRecipe(models.Model):
     class Meta:
         verbose_name = 'Ингредиент в рецепте'
         verbose_name_plural = 'Ингредиенты в рецептах'
+        indexes = [
+            models.Index(
+                fields=['recipe'],
+                include=['ingredient', 'amount'],
+                name='ingredient_recipe_cover_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['ingredient', 'recipe'],
@@ -216,3 +304,40 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user} added {self.recipe} to shopping cart'
+
+
+class ShoppingCartIngredient(models.Model):
+    """Ingredient totals of a user's shopping cart.
+
+    Maintained by `recipes.services.refresh_shopping_lists`, so that the
+    shopping list download doesn't aggregate carted recipes every time.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='User'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Ingredient'
+    )
+    total_amount = models.PositiveIntegerField(
+        verbose_name='Total amount'
+    )
+
+    class Meta:
+        verbose_name = 'Shopping list ingredient'
+        verbose_name_plural = 'Shopping list ingredients'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_ingredient'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user} needs {self.total_amount} of {self.ingredient}'
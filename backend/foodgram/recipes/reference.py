@@ -0,0 +1,5 @@
+from core.reference import ReferenceRegistry
+from .models import Ingredient, Tag
+
+tags = ReferenceRegistry(Tag, 'tags', slug_field='slug')
+ingredients = ReferenceRegistry(Ingredient, 'ingredients')
@@ -0,0 +1,78 @@
+import threading
+from bisect import bisect_left
+
+from . import reference
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class IngredientIndex:
+    """In-process autocomplete index over all ingredients.
+
+    Names are kept in a sorted array for prefix lookups and in a trigram
+    index for substring lookups. The index is built from the ingredient
+    reference snapshot and rebuilt whenever that snapshot is reloaded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._source = None
+        self._snapshot = None
+
+    def _build(self, ingredients):
+        rows = sorted(
+            ({'id': item.id, 'name': item.name, 'measure': item.measure}
+             for item in ingredients),
+            key=lambda row: (row['name'].lower(), row['id'])
+        )
+        keys = [row['name'].lower() for row in rows]
+        postings = {}
+        for position, key in enumerate(keys):
+            for trigram in trigrams(key):
+                postings.setdefault(trigram, []).append(position)
+        return rows, keys, postings
+
+    def _get_snapshot(self):
+        source = reference.ingredients.get()
+        if self._source is not source:
+            with self._lock:
+                if self._source is not source:
+                    self._snapshot = self._build(source.items)
+                    self._source = source
+        return self._snapshot
+
+    def search(self, query, limit=None):
+        """Return ingredients matching `query`, prefix matches first."""
+        rows, keys, postings = self._get_snapshot()
+        query = query.strip().lower()
+        if not query:
+            return rows[:limit]
+
+        prefixed = []
+        position = bisect_left(keys, query)
+        while position < len(keys) and keys[position].startswith(query):
+            prefixed.append(position)
+            position += 1
+        if limit is not None and len(prefixed) >= limit:
+            return [rows[position] for position in prefixed[:limit]]
+
+        if len(query) < 3:
+            candidates = range(len(keys))
+        else:
+            lists = sorted(
+                (postings.get(trigram, []) for trigram in trigrams(query)),
+                key=len
+            )
+            candidates = set(lists[0]).intersection(*lists[1:])
+            candidates = sorted(candidates)
+        contained = [
+            position for position in candidates
+            if query in keys[position] and not keys[position].startswith(query)
+        ]
+        matches = prefixed + contained
+        return [rows[position] for position in matches[:limit]]
+
+
+ingredient_index = IngredientIndex()
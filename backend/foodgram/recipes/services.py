@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from core.versions import bump_version_on_commit, user_scope
+from users.models import User
+from .models import (Favorite, IngredientRecipe, Recipe, ShoppingCart,
+                     ShoppingCartIngredient)
+
+# (model, counter column, counted model, its foreign key to `model`)
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'carts_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'subscribers_count', User.subscriptions.through, 'to_user'),
+)
+
+
+@transaction.atomic
+def refresh_shopping_lists(user_ids, ingredient_ids=None):
+    """Recompute shopping list totals of the given users.
+
+    Only rows of `ingredient_ids` are rebuilt when it is given, which keeps
+    cart changes proportional to the size of the touched recipe.
+    """
+    # Lock the users so concurrent refreshes can't insert the same rows.
+    list(User.objects.select_for_update().filter(pk__in=user_ids)
+         .values_list('pk', flat=True))
+    items = ShoppingCartIngredient.objects.filter(user_id__in=user_ids)
+    totals = IngredientRecipe.objects.filter(
+        recipe__shopping_cart__user_id__in=user_ids
+    )
+    if ingredient_ids is not None:
+        items = items.filter(ingredient_id__in=ingredient_ids)
+        totals = totals.filter(ingredient_id__in=ingredient_ids)
+    totals = totals.values(
+        'recipe__shopping_cart__user_id', 'ingredient_id'
+    ).annotate(total_amount=Sum('amount')).order_by()
+    items.delete()
+    ShoppingCartIngredient.objects.bulk_create(
+        ShoppingCartIngredient(
+            user_id=total['recipe__shopping_cart__user_id'],
+            ingredient_id=total['ingredient_id'],
+            total_amount=total['total_amount']
+        ) for total in totals
+    )
+
+
+def refresh_recipe_in_shopping_lists(recipe, ingredient_ids=None):
+    """Refresh the lists of every user who has `recipe` in the cart."""
+    user_ids = list(recipe.shopping_cart.values_list('user_id', flat=True))
+    if not user_ids:
+        return
+    if ingredient_ids is None:
+        ingredient_ids = recipe.ingredients.values('id')
+    refresh_shopping_lists(user_ids, ingredient_ids)
+
+
+def adjust_counters(model, pk, **deltas):
+    """Add `deltas` to the counter columns of one row in one UPDATE.
+
+    Decrements stop at zero, drift is left to `reconcile_counters`.
+    Shared recipe reads are not invalidated, their ETags and cached
+    copies expire within `COUNTERS_MAX_AGE`.
+    """
+    model.objects.filter(pk=pk).update(**{
+        name: F(name) + delta if delta >= 0 else Greatest(F(name) + delta, 0)
+        for name, delta in deltas.items()
+    })
+    if model is User:
+        # update() sends no signals, the user's own reads show counters.
+        bump_version_on_commit(user_scope(pk))
+
+
+def count_related(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by()
+        .values(field).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+@transaction.atomic
+def reconcile_counters():
+    """Recount every counter column and fix the rows that drifted.
+
+    Returns the number of fixed rows per `model.column`.
+    """
+    fixed = {}
+    for model, name, counted_model, field in COUNTERS:
+        actual = count_related(counted_model, field)
+        fixed[f'{model._meta.model_name}.{name}'] = model.objects.exclude(
+            **{name: actual}
+        ).update(**{name: actual})
+    if any(fixed.values()):
+        bump_version_on_commit('recipes')
+    return fixed
@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from core.versions import bump_version_on_commit
+from users.models import User
+from .models import Ingredient, Recipe, Tag
+from .services import adjust_counters, refresh_shopping_lists
+
+
+@receiver(pre_delete, sender=Recipe)
+def drop_recipe_from_shopping_lists(sender, instance, **kwargs):
+    user_ids = list(
+        instance.shopping_cart.values_list('user_id', flat=True)
+    )
+    if not user_ids:
+        return
+    ingredient_ids = list(
+        instance.ingredients.values_list('id', flat=True)
+    )
+    transaction.on_commit(
+        lambda: refresh_shopping_lists(user_ids, ingredient_ids)
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def count_created_recipe(sender, instance, created, **kwargs):
+    if created:
+        adjust_counters(User, instance.author_id, recipes_count=1)
+
+
+@receiver(post_delete, sender=Recipe)
+def count_deleted_recipe(sender, instance, **kwargs):
+    adjust_counters(User, instance.author_id, recipes_count=-1)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_tags_version(sender, **kwargs):
+    bump_version_on_commit('tags')
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_ingredients_version(sender, **kwargs):
+    bump_version_on_commit('ingredients')
@@ -0,0 +1,127 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart)
+from users.models import User
+
+USERS = 200
+RECIPES_PER_AUTHOR = 10
+INGREDIENTS = 100
+INGREDIENTS_PER_RECIPE = 5
+RELATIONS_PER_USER = 20
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN output of PostgreSQL')
+class IndexUsageTests(TestCase):
+    """The planner picks the hot filters' indexes on a realistic dataset."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create(
+            User(email=f'user{number}@example.com', username=f'user{number}',
+                 first_name='user', last_name='user')
+            for number in range(USERS)
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ingredient {number}', measure='г')
+            for number in range(INGREDIENTS)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(author=author, name=f'Recipe {number}', text='Text',
+                   image='recipes/images/test.png', cooking_time=10)
+            for author in users for number in range(RECIPES_PER_AUTHOR)
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe=recipe, amount=5,
+                ingredient=ingredients[(index + offset) % INGREDIENTS]
+            )
+            for index, recipe in enumerate(recipes)
+            for offset in range(INGREDIENTS_PER_RECIPE)
+        )
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create(
+                model(user=user, recipe=recipes[
+                    (index * 7 + offset * 13) % len(recipes)
+                ])
+                for index, user in enumerate(users)
+                for offset in range(RELATIONS_PER_USER)
+            )
+        User.subscriptions.through.objects.bulk_create(
+            User.subscriptions.through(
+                from_user=user, to_user=users[(index + offset) % USERS]
+            )
+            for index, user in enumerate(users)
+            for offset in range(1, 6)
+        )
+        with connection.cursor() as cursor:
+            for model in (User, User.subscriptions.through, Ingredient,
+                          Recipe, IngredientRecipe, Favorite, ShoppingCart):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+        cls.user = users[0]
+        cls.author = users[1]
+        cls.recipe = recipes[0]
+
+    def assert_uses_index(self, queryset, *indexes):
+        plan = queryset.explain()
+        self.assertTrue(
+            any(index in plan for index in indexes),
+            f'None of {indexes} in:\n{plan}'
+        )
+
+    def test_recipe_feed(self):
+        self.assert_uses_index(
+            Recipe.objects.order_by('-created', '-id')[:10],
+            'recipe_created_id_idx'
+        )
+
+    def test_author_feed(self):
+        self.assert_uses_index(
+            Recipe.objects.filter(author=self.author)
+            .order_by('-created', '-id')[:10],
+            'recipe_author_created_idx'
+        )
+
+    def test_recipe_ingredients(self):
+        self.assert_uses_index(
+            IngredientRecipe.objects.filter(recipe=self.recipe)
+            .values('ingredient_id', 'amount'),
+            'ingredient_recipe_cover_idx'
+        )
+
+    def test_subscribers(self):
+        self.assert_uses_index(
+            User.subscriptions.through.objects.filter(to_user=self.author)
+            .values('from_user_id'),
+            'users_user_subscriptions_to_user_id'
+        )
+
+    def test_user_recipe_flags(self):
+        for model, index in ((Favorite, 'unique_favorite'),
+                             (ShoppingCart, 'unique_shopping')):
+            with self.subTest(model.__name__):
+                self.assert_uses_index(
+                    model.objects.filter(user=self.user, recipe=self.recipe),
+                    index
+                )
+
+    def test_user_recipe_lists(self):
+        for model, index in ((Favorite, 'unique_favorite'),
+                             (ShoppingCart, 'unique_shopping')):
+            with self.subTest(model.__name__):
+                self.assert_uses_index(
+                    model.objects.filter(user=self.user)
+                    .values('recipe_id'),
+                    index, f'{model._meta.db_table}_user_id'
+                )
+
+    def test_recipe_relation_counts(self):
+        for model in (Favorite, ShoppingCart):
+            with self.subTest(model.__name__):
+                self.assert_uses_index(
+                    model.objects.filter(recipe=self.recipe).values('pk'),
+                    f'{model._meta.db_table}_recipe_id'
+                )
@@ -0,0 +1,142 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Migrate back to `before`, seed rows, then migrate to `after`."""
+    before = after = None
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+        super().tearDown()
+
+    def create_user(self, apps, name):
+        return apps.get_model('users', 'User').objects.create(
+            email=f'{name}@example.com', username=name,
+            first_name=name, last_name=name
+        )
+
+
+class IngredientDeduplicationTests(MigrationTestCase):
+    """The unique (name, measure) migration merges existing duplicates."""
+    before = [('recipes', '0008_shoppingcartingredient')]
+    after = [('recipes', '0009_ingredient_unique_name_measure')]
+
+    def test_duplicates_are_merged(self):
+        apps = self.migrate(self.before)
+        ingredient_model = apps.get_model('recipes', 'Ingredient')
+        recipe_model = apps.get_model('recipes', 'Recipe')
+        amount_model = apps.get_model('recipes', 'IngredientRecipe')
+        cart_model = apps.get_model('recipes', 'ShoppingCartIngredient')
+        user = self.create_user(apps, 'cook')
+        salt, salt_copy, other_salt = (
+            ingredient_model.objects.create(name='соль', measure=measure)
+            for measure in ('г', 'г', 'кг')
+        )
+        both, copy_only = (
+            recipe_model.objects.create(
+                author=user, name=name, image='recipes/images/test.png',
+                text='Text', cooking_time=10
+            ) for name in ('Both', 'Copy only')
+        )
+        amount_model.objects.bulk_create([
+            amount_model(recipe=both, ingredient=salt, amount=2),
+            amount_model(recipe=both, ingredient=salt_copy, amount=3),
+            amount_model(recipe=copy_only, ingredient=salt_copy, amount=4),
+        ])
+        cart_model.objects.bulk_create([
+            cart_model(user=user, ingredient=salt, total_amount=2),
+            cart_model(user=user, ingredient=salt_copy, total_amount=7),
+        ])
+
+        apps = self.migrate(self.after)
+
+        ingredient_model = apps.get_model('recipes', 'Ingredient')
+        amount_model = apps.get_model('recipes', 'IngredientRecipe')
+        cart_model = apps.get_model('recipes', 'ShoppingCartIngredient')
+        self.assertEqual(
+            set(ingredient_model.objects.values_list('pk', flat=True)),
+            {salt.pk, other_salt.pk}
+        )
+        self.assertEqual(
+            set(amount_model.objects.values_list(
+                'recipe_id', 'ingredient_id', 'amount'
+            )),
+            {(both.pk, salt.pk, 5), (copy_only.pk, salt.pk, 4)}
+        )
+        self.assertEqual(
+            list(cart_model.objects.values_list(
+                'ingredient_id', 'total_amount'
+            )),
+            [(salt.pk, 9)]
+        )
+
+
+class RecipeUserRelationsMergeTests(MigrationTestCase):
+    """Dropping the recipe user M2Ms keeps their rows as relations."""
+    before = [('recipes', '0013_hot_filter_indexes'),
+              ('users', '0002_user_counters')]
+    after = [('recipes', '0014_merge_recipe_user_relations'),
+             ('users', '0002_user_counters')]
+
+    def test_relations_are_merged(self):
+        apps = self.migrate(self.before)
+        ingredient_model = apps.get_model('recipes', 'Ingredient')
+        recipe_model = apps.get_model('recipes', 'Recipe')
+        amount_model = apps.get_model('recipes', 'IngredientRecipe')
+        favorite_model = apps.get_model('recipes', 'Favorite')
+        cart_model = apps.get_model('recipes', 'ShoppingCart')
+        author, cook, guest = (
+            self.create_user(apps, name)
+            for name in ('author', 'cook', 'guest')
+        )
+        salt = ingredient_model.objects.create(name='соль', measure='г')
+        soup, stew = (
+            recipe_model.objects.create(
+                author=author, name=name, image='recipes/images/test.png',
+                text='Text', cooking_time=10
+            ) for name in ('Soup', 'Stew')
+        )
+        for recipe in (soup, stew):
+            amount_model.objects.create(
+                recipe=recipe, ingredient=salt, amount=2
+            )
+        # The cook's favorite exists both ways, it must not be doubled.
+        favorite_model.objects.create(user=cook, recipe=soup)
+        soup.favorited_users.add(cook, guest)
+        stew.shopping_users.add(cook)
+        cart_model.objects.create(user=cook, recipe=soup)
+
+        apps = self.migrate(self.after)
+
+        recipe_model = apps.get_model('recipes', 'Recipe')
+        favorite_model = apps.get_model('recipes', 'Favorite')
+        cart_model = apps.get_model('recipes', 'ShoppingCart')
+        list_model = apps.get_model('recipes', 'ShoppingCartIngredient')
+        self.assertEqual(
+            set(favorite_model.objects.values_list('user_id', 'recipe_id')),
+            {(cook.pk, soup.pk), (guest.pk, soup.pk)}
+        )
+        self.assertEqual(
+            set(cart_model.objects.values_list('user_id', 'recipe_id')),
+            {(cook.pk, soup.pk), (cook.pk, stew.pk)}
+        )
+        self.assertEqual(
+            set(recipe_model.objects.values_list(
+                'pk', 'favorites_count', 'carts_count'
+            )),
+            {(soup.pk, 2, 1), (stew.pk, 0, 1)}
+        )
+        self.assertEqual(
+            list(list_model.objects.values_list(
+                'user_id', 'ingredient_id', 'total_amount'
+            )),
+            [(cook.pk, salt.pk, 4)]
+        )
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.core import validators
 from django.db import models
+from django.db.models import Exists, OuterRef
 
 
 class User(AbstractUser):
@@ -25,6 +26,16 @@ class User(AbstractUser):
         related_name='subscribers',
         symmetrical=False
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Рецептов',
+        default=0,
+        editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         ordering = ['email']
@@ -36,3 +47,10 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+
+def is_subscribed(user):
+    """Whether `user` is subscribed to the outer user row, for `annotate`."""
+    return Exists(User.subscriptions.through.objects.filter(
+        from_user_id=user.pk, to_user_id=OuterRef('pk')
+    ))